@@ -17,6 +17,8 @@ from utils.api_client import (
     check_authentication,
     logout
 )
+from utils.heatmap_utils import choose_time_bucket
+from utils.data_access import load_demand_data, prefetch_page_data, DEMAND_CACHE_TTL, DEMAND_CACHE_MAX_ENTRIES
 from utils.translations import t, create_language_selector
 
 # Page configuration
@@ -174,6 +176,11 @@ st.markdown("""
         color: white;
     }
     
+    .metric-change.negative {
+        background: linear-gradient(145deg, #F44336, #D32F2F);
+        color: white;
+    }
+    
     /* Enhanced tool cards */
     .tools-container {
         display: grid;
@@ -418,29 +425,36 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_data(ttl=DEMAND_CACHE_TTL)
+def load_weekly_comparison():
+    """Load week-over-week demand totals from backend API"""
+    client = get_api_client()
+    return client.get_period_comparison(period="week")
+
 def load_dashboard_data():
-    """Load dashboard data from backend API ONLY"""
+    """Load dashboard data and week-over-week totals from backend API ONLY"""
     try:
         client = get_api_client()
-        if client.health_check():
-            df = client.get_demand_data()
-            if not df.empty:
-                # Ensure date column is datetime
-                if 'date' in df.columns:
-                    df['date'] = pd.to_datetime(df['date'])
-                return df
-            else:
-                st.info("💡 **Backend connected** but no data available. Use 'Seed Database' in Settings to populate sample data.")
-                return pd.DataFrame()
+        # Independent requests, fetched concurrently
+        results = client.fetch_many({
+            "demand": load_demand_data,
+            "comparison": load_weekly_comparison,
+        })
+        df = results["demand"]
+        if not df.empty:
+            return df, results["comparison"]
+        # The demand request itself tells whether the backend was reachable
+        elif client.health_check():
+            st.info("💡 **Backend connected** but no data available. Use 'Seed Database' in Settings to populate sample data.")
+            return pd.DataFrame(), None
         else:
             st.error("❌ **Backend connection failed**")
-            return pd.DataFrame()
+            return pd.DataFrame(), None
     except Exception as e:
         st.error(f"❌ **Data loading error**: {str(e)}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
 
-def create_summary_metrics(df):
+def create_summary_metrics(df, comparison=None):
     """Create enhanced summary metrics with better cards"""
     if df.empty:
         st.info(f"📊 **{t('no_data_available')}** - Metrics will appear after adding data")
@@ -452,6 +466,14 @@ def create_summary_metrics(df):
     peak_demand = int(df['predicted_demand'].max()) if 'predicted_demand' in df.columns else 0
     unique_dishes = df['dish_name'].nunique() if 'dish_name' in df.columns else 0
     
+    # Week-over-week change computed by the backend
+    change_pct = comparison["totals"]["change_pct"] if comparison else None
+    if change_pct is None:
+        change_class, change_text = "neutral", t('no_previous_week')
+    else:
+        change_class = "positive" if change_pct >= 0 else "negative"
+        change_text = f"{change_pct:+.1f}% {t('vs_last_week')}"
+    
     # Create metrics HTML
     st.markdown(f"""
     <div class="metrics-container">
@@ -459,7 +481,7 @@ def create_summary_metrics(df):
             <div class="metric-icon">📊</div>
             <div class="metric-value">{total_demand:,}</div>
             <div class="metric-label">{t('total_demand')}</div>
-            <div class="metric-change positive">+12% {t('vs_last_week')}</div>
+            <div class="metric-change {change_class}">{change_text}</div>
         </div>
         <div class="metric-card">
             <div class="metric-icon">📅</div>
@@ -482,15 +504,18 @@ def create_summary_metrics(df):
     </div>
     """, unsafe_allow_html=True)
 
-def create_demand_chart(df):
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES)
+def load_demand_series(bucket):
+    """Load bucketed, gap-filled demand totals from backend API"""
+    client = get_api_client()
+    return client.get_demand_series(bucket=bucket)
+
+def create_demand_chart(daily_demand):
     """Create an enhanced demand visualization"""
-    if df.empty or 'date' not in df.columns:
+    if daily_demand.empty or 'date' not in daily_demand.columns:
         st.info(f"📈 **{t('chart_requires_data')}**")
         return
     
-    # Aggregate data by date
-    daily_demand = df.groupby('date')['predicted_demand'].sum().reset_index()
-    
     if not daily_demand.empty:
         # Create enhanced chart
         fig = px.line(
@@ -566,16 +591,17 @@ def main():
     
     # Load and display data
     with st.spinner(f"🔄 {t('loading_data')}"):
-        df = load_dashboard_data()
+        df, weekly_comparison = load_dashboard_data()
     
     if not df.empty:
         # Performance Metrics
         st.markdown(f"### 📊 {t('live_performance_dashboard')}")
-        create_summary_metrics(df)
+        create_summary_metrics(df, weekly_comparison)
         
         # Analytics Chart
         st.markdown(f"### 📈 {t('realtime_demand_analytics')}")
-        create_demand_chart(df)
+        bucket = choose_time_bucket(df['date'].min(), df['date'].max())
+        create_demand_chart(load_demand_series(bucket))
         
         st.markdown("---")
     
@@ -714,6 +740,10 @@ def main():
         <p style="margin: 0.5rem 0 0 0; font-size: 0.9rem;">Powered by Streamlit • FastAPI • Railway Cloud</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Most visits continue to the Forecasting Tool or Heatmap; load their data in the meantime
+    if not df.empty:
+        get_api_client().prefetch(prefetch_page_data)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
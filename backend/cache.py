@@ -0,0 +1,332 @@
+"""
+Query-result caching for the KKCG Analytics API.
+
+Cached values are already-serialized response bodies (bytes), so a hit is a
+lookup followed by writing the bytes back to the client. Backends:
+
+- ``memory``: per-process LRU, fastest, but every worker warms its own copy
+- ``sqlite``: a local SQLite file shared by all workers on one host
+- ``redis``: any Redis-protocol server, shared by workers on any host
+
+Every backend keeps a generation number that ``clear()`` bumps. Callers put
+it in their keys so a result computed before an invalidation can never be
+read back after it, even when another worker stored it.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Interface shared by all result cache backends"""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        """Drop all entries and bump the generation"""
+
+    @abstractmethod
+    def generation(self) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+class ByteLRUCache(CacheBackend):
+    """In-process LRU cache bounded by the total size of its values in bytes"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._generation = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+            self._entries[key] = value
+            self.current_bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self._generation += 1
+
+    def generation(self) -> int:
+        return self._generation
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """LRU cache in a local SQLite file, shared by every worker on the host
+
+    Hits don't write: access times are collected in memory and written in
+    batches, at the latest before this worker next evicts. Eviction order
+    can therefore lag other workers' recent hits by one batch. The total
+    size of all entries is kept in ``cache_meta`` so stores don't sum it.
+    """
+
+    name = "sqlite"
+
+    # Pending access times are written once this many pile up or this many seconds pass
+    ACCESS_FLUSH_SIZE = 256
+    ACCESS_FLUSH_INTERVAL = 5.0
+
+    def __init__(self, path: str = "kkcg_cache.sqlite3", max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._accessed: Dict[str, float] = {}
+        self._accessed_lock = threading.Lock()
+        self._accessed_flushed = time.monotonic()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed)")
+        connection.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('generation', 0)")
+        # Files from before the running total start from the entries they hold
+        connection.execute(
+            "INSERT OR IGNORE INTO cache_meta (name, value) "
+            "SELECT 'bytes', COALESCE(SUM(size), 0) FROM cache_entries"
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        connection = self._connection()
+        row = connection.execute("SELECT value FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+            due = (len(self._accessed) >= self.ACCESS_FLUSH_SIZE
+                   or time.monotonic() - self._accessed_flushed >= self.ACCESS_FLUSH_INTERVAL)
+        if due:
+            try:
+                self._flush_accessed(connection)
+            except sqlite3.Error as e:
+                # Only LRU order suffers; the hit itself is fine
+                logger.warning(f"Failed to record cache access times: {e}")
+        return row[0]
+
+    def _flush_accessed(self, connection: sqlite3.Connection):
+        """Write the access times collected since the last flush"""
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+            self._accessed_flushed = time.monotonic()
+        if accessed:
+            connection.executemany(
+                "UPDATE cache_entries SET accessed = ? WHERE key = ?",
+                [(when, key) for key, when in accessed.items()]
+            )
+
+    def set(self, key: str, value: bytes):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Let eviction see this worker's recent hits
+            self._flush_accessed(connection)
+            previous = connection.execute("SELECT size FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, time.time())
+            )
+            total = self._total_bytes(connection) + size - (previous[0] if previous else 0)
+            while total > self.max_bytes:
+                oldest = connection.execute(
+                    "SELECT key, size FROM cache_entries WHERE key != ? ORDER BY accessed LIMIT 1", (key,)
+                ).fetchone()
+                if oldest is None:
+                    break
+                connection.execute("DELETE FROM cache_entries WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.evictions += 1
+            connection.execute("UPDATE cache_meta SET value = ? WHERE name = 'bytes'", (total,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM cache_entries")
+        connection.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'")
+        connection.execute("UPDATE cache_meta SET value = 0 WHERE name = 'bytes'")
+        connection.execute("COMMIT")
+        with self._accessed_lock:
+            self._accessed.clear()
+
+    def generation(self) -> int:
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()
+        return row[0]
+
+    @staticmethod
+    def _total_bytes(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT value FROM cache_meta WHERE name = 'bytes'").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        connection = self._connection()
+        entries = connection.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self._total_bytes(connection),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache on a Redis-protocol server, shared by workers on any host.
+
+    Size-bounded eviction is left to the server (``maxmemory`` with an LRU
+    policy); entries also expire after ``ttl`` seconds. ``clear()`` only bumps
+    the generation, which orphans old keys until they expire.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "kkcg", ttl: int = 3600):
+        if redis is None:
+            raise RuntimeError("The redis cache backend requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.client.ping()
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self._key(key))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self.client.set(self._key(key), value, ex=self.ttl)
+
+    def clear(self):
+        self.client.incr(self._key("generation"))
+
+    def generation(self) -> int:
+        return int(self.client.get(self._key("generation")) or 0)
+
+    def stats(self) -> Dict[str, int]:
+        info = self.client.info("memory")
+        return {
+            "bytes": info.get("used_memory", 0),
+            "max_bytes": info.get("maxmemory", 0),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+CACHE_BACKENDS = ("memory", "sqlite", "redis")
+
+
+def create_cache_backend(kind: str = "memory", url: Optional[str] = None,
+                         max_bytes: int = 64 * 1024 * 1024) -> CacheBackend:
+    """Build the configured cache backend, falling back to memory if it is unavailable"""
+    if kind not in CACHE_BACKENDS:
+        logger.error(f"Unknown cache backend '{kind}' (expected one of {', '.join(CACHE_BACKENDS)}), "
+                     f"using in-process memory cache")
+    try:
+        if kind == "sqlite":
+            return SQLiteCacheBackend(url or "kkcg_cache.sqlite3", max_bytes=max_bytes)
+        if kind == "redis":
+            return RedisCacheBackend(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    except Exception as e:
+        logger.error(f"Cache backend '{kind}' unavailable, using in-process memory cache: {e}")
+    return ByteLRUCache(max_bytes=max_bytes)
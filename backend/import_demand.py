@@ -0,0 +1,47 @@
+"""
+Bulk import historical POS demand into the KKCG Analytics database.
+
+Usage:
+    python import_demand.py sales_2023.csv
+    python import_demand.py sales_2023.parquet --chunk-size 20000
+
+Files need outlet, dish, date and predicted columns (actual and
+weather_factor are optional). Outlet and dish names must already exist;
+unknown names are reported as rejected rows.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from main import engine, import_demand_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import historical demand data")
+    parser.add_argument("path", help="CSV or Parquet file to import")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="File format (default: inferred from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows parsed and loaded per batch")
+    args = parser.parse_args()
+
+    if not engine:
+        print("Database not available - check DATABASE_URL", file=sys.stderr)
+        return 1
+
+    file_format = args.format or ("parquet" if os.path.splitext(args.path)[1].lower() == ".parquet" else "csv")
+
+    with open(args.path, "rb") as handle:
+        try:
+            result = import_demand_file(handle, file_format, args.chunk_size)
+        except ValueError as e:
+            print(f"Import failed: {e}", file=sys.stderr)
+            return 1
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
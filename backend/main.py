@@ -1,17 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, text
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response, RedirectResponse
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, text, func, case, insert, inspect, select, literal
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta, date
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple, Union
 import os
+import asyncio
+import csv
+import io
+import json
+import math
 import random
+import tempfile
+import time
+import uuid
 import hashlib
 import jwt
 import logging
 
+from cache import create_cache_backend
+from profiling import ProfileStore, ProfilerMiddleware, profiled_iter, profiled_thread
+from scheduler import Scheduler
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +56,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiler. The middleware is only installed when enabled, so
+# requests pay nothing for it otherwise.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+profile_store = None
+
+if PROFILING_ENABLED:
+    profile_store = ProfileStore(
+        max_profiles=int(os.getenv("PROFILE_MAX_STORED", 100)),
+        directory=os.getenv("PROFILE_DIR")
+    )
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", 0.0)),
+        interval=float(os.getenv("PROFILE_INTERVAL_MS", 10)) / 1000
+    )
+
 # Database configuration with fallback
 DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key-for-development")
@@ -112,17 +151,131 @@ class DemandData(Base):
     predicted_demand = Column(Integer)
     weather_factor = Column(Float, default=1.0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Dataset version of the last write to this row, for "changed since" queries
+    version = Column(Integer, default=0, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     outlet = relationship("Outlet")
     dish = relationship("Dish")
+    
+    # Grouping by outlet and dish within a date range reads this index in order
+    __table_args__ = (Index("ix_demand_data_outlet_dish_date", "outlet_id", "dish_id", "date"),)
+
+class DemandTombstone(Base):
+    __tablename__ = "demand_tombstones"
+    
+    # Deleted demand rows, so delta clients can drop them too
+    id = Column(Integer, primary_key=True)
+    demand_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+    
+    # Single row (id=1) bumped in the same transaction as every demand data write
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    # Dataset version the daily rollup was last brought up to
+    rollup_version = Column(Integer, default=0)
+    # Newest tombstone version and deletion time pruned; older deltas need a full refresh
+    tombstones_pruned_version = Column(Integer, default=0)
+    tombstones_pruned_before = Column(DateTime)
+
+class DemandRollup(Base):
+    __tablename__ = "demand_daily_rollup"
+    
+    # Per day, outlet and dish sums maintained by refresh_demand_rollup(); errors are predicted - actual
+    day = Column(Date, primary_key=True)
+    outlet_id = Column(Integer, primary_key=True)
+    dish_id = Column(Integer, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    predicted_sum = Column(Integer, nullable=False, default=0)
+    actual_count = Column(Integer, nullable=False, default=0)
+    actual_sum = Column(Integer, nullable=False, default=0)
+    matched_predicted_sum = Column(Integer, nullable=False, default=0)
+    abs_error_sum = Column(Integer, nullable=False, default=0)
+    squared_error_sum = Column(Float, nullable=False, default=0)
+    pct_error_sum = Column(Float, nullable=False, default=0)
+    pct_count = Column(Integer, nullable=False, default=0)
+
+class ForecastRun(Base):
+    __tablename__ = "forecast_runs"
+    
+    # One batch of forecasts; readers only see runs whose status is "complete"
+    run_id = Column(String, primary_key=True)
+    model_version = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="running")
+    dataset_version = Column(Integer)
+    start_date = Column(Date)
+    horizon_days = Column(Integer)
+    row_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, index=True)
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+    
+    # Which worker runs a scheduled job, and the latest scheduled time it was taken for
+    name = Column(String, primary_key=True)
+    owner = Column(String)
+    expires_at = Column(DateTime)
+    slot = Column(DateTime)
+
+class Forecast(Base):
+    __tablename__ = "forecasts"
+    
+    model_version = Column(String, primary_key=True)
+    run_id = Column(String, primary_key=True)
+    outlet_id = Column(Integer, primary_key=True)
+    dish_id = Column(Integer, primary_key=True)
+    target_date = Column(Date, primary_key=True)
+    predicted = Column(Float, nullable=False)
+    lower = Column(Float)
+    upper = Column(Float)
+
+def add_missing_columns():
+    """Add model columns and indexes that older databases lack.
+    
+    create_all only creates missing tables, and this project has no migration
+    tool, so new nullable/defaulted columns are added here on startup.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        added = [column for column in table.columns if column.name not in existing]
+        for column in added:
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"Added column {table.name}.{column.name}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine, checkfirst=True)
+                logger.info(f"Added index {index.name}")
 
 # Create tables only if database is available
 if engine:
     try:
         Base.metadata.create_all(bind=engine)
+        add_missing_columns()
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to create tables: {e}")
+    
+    try:
+        db = SessionLocal()
+        if not db.get(DatasetVersion, 1):
+            db.add(DatasetVersion(id=1, version=0))
+            db.commit()
+        db.close()
+    except Exception as e:
+        # Another worker may have created the row first
+        logger.warning(f"Dataset version row not created: {e}")
 
 # Pydantic Models
 class UserCreate(BaseModel):
@@ -176,6 +329,37 @@ class DemandDataResponse(BaseModel):
     predicted_demand: int
     weather_factor: float
 
+class DemandCompactResponse(BaseModel):
+    format: str
+    # Dataset version read before the rows, so it never claims changes the rows lack
+    version: Optional[int] = None
+    count: int
+    columns: Dict[str, List[Any]]
+    outlets: Dict[int, str]
+    dishes: Dict[int, str]
+
+class DemandDeltaResponse(BaseModel):
+    version: int
+    since_version: Optional[int]
+    full_refresh: bool
+    upserts: List[Dict[str, Any]]
+    deletes: List[int]
+
+class ForecastPoint(BaseModel):
+    outlet_id: int
+    dish_id: int
+    target_date: date
+    predicted: float
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+class ForecastRunCreate(BaseModel):
+    model_version: str
+    forecasts: List[ForecastPoint]
+    
+    class Config:
+        protected_namespaces = ()
+
 # Database dependency
 def get_db():
     if not SessionLocal:
@@ -193,6 +377,64 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed_password: str) -> bool:
     return hash_password(password) == hashed_password
 
+def percent_change(current: float, previous: float) -> Optional[float]:
+    """Percent change from previous to current, None when there is no baseline"""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+def date_bucket(column, bucket: str):
+    """SQL expression truncating a datetime column to a day, week (Monday) or month"""
+    if engine.dialect.name == "sqlite":
+        if bucket == "week":
+            return func.date(column, "weekday 0", "-6 days")
+        if bucket == "month":
+            return func.strftime("%Y-%m-01", column)
+        return func.date(column)
+    return func.date_trunc(bucket, column)
+
+def bucket_start(value, bucket: str) -> date:
+    """Python counterpart of date_bucket for building calendars"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+def next_bucket(value: date, bucket: str) -> date:
+    if bucket == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=7 if bucket == "week" else 1)
+
+def demand_series_calendar(bucket: str, start_date: Optional[datetime], end_date: Optional[datetime],
+                           totals: Dict[date, Any]) -> List[Dict[str, Any]]:
+    """Every bucket from start_date to end_date, zero where totals has no row.
+    
+    An open end is taken from the data, or from the other end when there is
+    none; with neither bound nor data the series is empty.
+    """
+    first = start_date or (min(totals) if totals else end_date)
+    last = end_date or (max(totals) if totals else start_date)
+    if first is None or last is None:
+        return []
+    
+    current, last = bucket_start(first, bucket), bucket_start(last, bucket)
+    series = []
+    while current <= last:
+        row = totals.get(current)
+        series.append({
+            "date": current,
+            "predicted_demand": row.predicted_demand if row else 0,
+            "actual_demand": row.actual_demand if row else None,
+            "records": row.records if row else 0
+        })
+        current = next_bucket(current, bucket)
+    return series
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=24)
@@ -200,6 +442,180 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
+# Query-result cache for read endpoints, keyed on normalized parameters and the
+# cache generation. CACHE_BACKEND=sqlite or redis shares one warm cache between
+# workers. Every write path must call invalidate_demand_caches().
+result_cache = create_cache_backend(
+    os.getenv("CACHE_BACKEND", "memory"),
+    url=os.getenv("CACHE_URL"),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+)
+logger.info(f"Using {result_cache.name} result cache")
+
+# Dataset version, read from the database at most once per TTL per worker
+DATASET_VERSION_TTL = float(os.getenv("DATASET_VERSION_TTL", 1.0))
+dataset_version_memo = {"version": None, "read_at": 0.0}
+
+def current_dataset_version() -> int:
+    """Monotonic version of the demand dataset, 0 in demo mode"""
+    if not engine:
+        return 0
+    
+    now = time.monotonic()
+    if dataset_version_memo["version"] is not None and now - dataset_version_memo["read_at"] < DATASET_VERSION_TTL:
+        return dataset_version_memo["version"]
+    
+    try:
+        db = SessionLocal()
+        version = db.query(DatasetVersion.version).filter(DatasetVersion.id == 1).scalar() or 0
+        db.close()
+    except Exception as e:
+        logger.error(f"Error reading dataset version: {e}")
+        return dataset_version_memo["version"] or 0
+    
+    dataset_version_memo.update(version=version, read_at=now)
+    return version
+
+def bump_dataset_version(db: Session) -> int:
+    """Increment the dataset version inside the caller's transaction"""
+    db.query(DatasetVersion).filter(DatasetVersion.id == 1).update(
+        {DatasetVersion.version: DatasetVersion.version + 1, DatasetVersion.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    return db.query(DatasetVersion.version).filter(DatasetVersion.id == 1).scalar()
+
+ROLLUP_COLUMNS = [
+    "day", "outlet_id", "dish_id", "row_count", "predicted_sum", "actual_count", "actual_sum",
+    "matched_predicted_sum", "abs_error_sum", "squared_error_sum", "pct_error_sum", "pct_count"
+]
+
+def demand_rollup_select(*filters):
+    """Aggregate demand rows into daily rollup rows, in ROLLUP_COLUMNS order"""
+    day = date_bucket(DemandData.date, "day")
+    actual = DemandData.actual_demand
+    predicted = DemandData.predicted_demand
+    error = predicted - actual
+    return select(
+        day,
+        DemandData.outlet_id,
+        DemandData.dish_id,
+        func.count(),
+        func.coalesce(func.sum(predicted), 0),
+        func.count(actual),
+        func.coalesce(func.sum(actual), 0),
+        func.coalesce(func.sum(case((actual.isnot(None), predicted), else_=0)), 0),
+        func.coalesce(func.sum(func.abs(error)), 0),
+        func.coalesce(func.sum(error * 1.0 * error), 0),
+        func.coalesce(func.sum(case((actual > 0, func.abs(error) * 1.0 / actual), else_=0)), 0),
+        func.count(case((actual > 0, 1)))
+    ).where(*filters).group_by(day, DemandData.outlet_id, DemandData.dish_id)
+
+def rollup_days(start_date: Optional[datetime], end_date: Optional[datetime]) -> Optional[Tuple[Optional[date], Optional[date]]]:
+    """First and last day a date filter covers, or None if it cuts through a day.
+    
+    Filters that start at midnight and end at 23:59:59.999999 (either end may
+    be open) select whole days, which the daily rollup can answer.
+    """
+    if start_date and start_date.time() != datetime.min.time():
+        return None
+    if end_date and end_date.time() != datetime.max.time():
+        return None
+    return (start_date.date() if start_date else None, end_date.date() if end_date else None)
+
+@profiled_thread
+def refresh_demand_rollup() -> Optional[Dict[str, Any]]:
+    """Bring the daily rollup up to the current dataset version.
+    
+    Only days from the earliest row written since the last refresh onwards are
+    recomputed. Tombstones don't record a deleted row's day, so any delete
+    rebuilds the whole rollup. Returns None if the refresh failed. It blocks
+    on writers and may rebuild, so async handlers run it in the threadpool.
+    """
+    db = SessionLocal()
+    try:
+        # Most calls find nothing to do; only take the row lock when there is
+        rolled, version = db.query(DatasetVersion.rollup_version, DatasetVersion.version)\
+            .filter(DatasetVersion.id == 1).one()
+        if (rolled or 0) >= version:
+            db.rollback()
+            return {"version": version, "rebuilt": False, "from_day": None}
+        
+        # Locking the version row serializes refreshes with each other and with writers
+        state = db.query(DatasetVersion).filter(DatasetVersion.id == 1).with_for_update().one()
+        rolled, version = state.rollup_version or 0, state.version
+        if rolled >= version:
+            db.rollback()
+            return {"version": version, "rebuilt": False, "from_day": None}
+        
+        deleted = db.query(DemandTombstone.id).filter(DemandTombstone.version > rolled).first() is not None
+        rebuilt = deleted or not rolled
+        first_day = None
+        if rebuilt:
+            db.query(DemandRollup).delete(synchronize_session=False)
+            db.execute(insert(DemandRollup).from_select(ROLLUP_COLUMNS, demand_rollup_select()))
+        else:
+            earliest = db.query(func.min(DemandData.date)).filter(DemandData.version > rolled).scalar()
+            # The version can move without demand rows changing
+            if earliest is not None:
+                first_day = bucket_start(earliest, "day")
+                db.query(DemandRollup).filter(DemandRollup.day >= first_day).delete(synchronize_session=False)
+                db.execute(insert(DemandRollup).from_select(
+                    ROLLUP_COLUMNS,
+                    demand_rollup_select(DemandData.date >= datetime.combine(first_day, datetime.min.time()))
+                ))
+        
+        state.rollup_version = version
+        db.commit()
+        return {"version": version, "rebuilt": rebuilt, "from_day": first_day}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error refreshing demand rollup: {e}")
+        return None
+    finally:
+        db.close()
+
+def invalidate_demand_caches():
+    """Drop cached query results after demand data changes"""
+    dataset_version_memo["version"] = None
+    try:
+        result_cache.clear()
+    except Exception as e:
+        logger.error(f"Failed to invalidate result cache: {e}")
+
+def query_cache_key(endpoint: str, *params) -> str:
+    """Normalized cache key; unset and falsy parameters collapse to the same key"""
+    parts = [
+        value.isoformat() if isinstance(value, (datetime, date)) else str(value or "")
+        for value in params
+    ]
+    return f"{endpoint}:d{current_dataset_version()}:g{result_cache.generation()}:" + "|".join(parts)
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def cached_json_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status})
+
+def cache_lookup(key: str) -> Optional[Response]:
+    """Return the cached response for key, treating cache errors as misses"""
+    try:
+        body = result_cache.get(key)
+    except Exception as e:
+        logger.error(f"Result cache read failed: {e}")
+        return None
+    return cached_json_response(body, "HIT") if body is not None else None
+
+def cache_store(key: str, payload: Any) -> Response:
+    """Serialize payload once, cache it and return it as the response"""
+    body = json.dumps(payload, default=json_default).encode()
+    try:
+        result_cache.set(key, body)
+    except Exception as e:
+        logger.error(f"Result cache write failed: {e}")
+    return cached_json_response(body, "MISS")
+
 # Sample data for demo mode
 SAMPLE_OUTLETS = [
     {"id": 1, "name": "Chennai Central", "location": "Chennai, Tamil Nadu", "is_active": 1},
@@ -249,6 +665,338 @@ def generate_sample_demand_data():
                 })
     return data
 
+# Columns /demand-data can project, in response order
+DEMAND_FIELDS = {
+    "id": DemandData.id,
+    "outlet_id": DemandData.outlet_id,
+    "dish_id": DemandData.dish_id,
+    "outlet_name": Outlet.name,
+    "dish_name": Dish.name,
+    "date": DemandData.date,
+    "actual_demand": DemandData.actual_demand,
+    "predicted_demand": DemandData.predicted_demand,
+    "weather_factor": DemandData.weather_factor
+}
+DEFAULT_DEMAND_FIELDS = ["id", "outlet_name", "dish_name", "date", "actual_demand", "predicted_demand", "weather_factor"]
+
+def parse_demand_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated ?fields= list, keeping the canonical column order"""
+    if not fields:
+        return list(DEFAULT_DEMAND_FIELDS)
+    
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(DEMAND_FIELDS)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(DEMAND_FIELDS)}"
+        )
+    return [name for name in DEMAND_FIELDS if name in requested]
+
+def build_demand_query(db: Session,
+                       start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       outlet_id: Optional[int] = None,
+                       dish_id: Optional[int] = None,
+                       fields: Optional[List[str]] = None):
+    """Demand rows projected to fields (names joined in only when asked for), filtered"""
+    fields = fields or DEFAULT_DEMAND_FIELDS
+    query = db.query(*[DEMAND_FIELDS[name].label(name) for name in fields]).select_from(DemandData)
+    if "outlet_name" in fields:
+        query = query.join(Outlet, DemandData.outlet_id == Outlet.id)
+    if "dish_name" in fields:
+        query = query.join(Dish, DemandData.dish_id == Dish.id)
+    
+    if start_date:
+        query = query.filter(DemandData.date >= start_date)
+    if end_date:
+        query = query.filter(DemandData.date <= end_date)
+    if outlet_id:
+        query = query.filter(DemandData.outlet_id == outlet_id)
+    if dish_id:
+        query = query.filter(DemandData.dish_id == dish_id)
+    
+    return query
+
+# Export settings
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 10000))
+EXPORT_COLUMNS = DEFAULT_DEMAND_FIELDS
+
+def iter_export_rows(start_date, end_date, outlet_id, dish_id) -> Iterator[tuple]:
+    """Stream export rows from a server-side cursor, falling back to sample data"""
+    if not engine:
+        for item in generate_sample_demand_data():
+            yield tuple(item[column] for column in EXPORT_COLUMNS)
+        return
+    
+    db = SessionLocal()
+    try:
+        query = build_demand_query(db, start_date, end_date, outlet_id, dish_id).order_by(DemandData.id)
+        for row in query.execution_options(stream_results=True).yield_per(EXPORT_CHUNK_ROWS):
+            yield tuple(row)
+    finally:
+        db.close()
+
+def iter_chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream_csv(rows: Iterable[tuple]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in iter_chunks(rows, EXPORT_CHUNK_ROWS):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class ParquetChunkSink:
+    """Write-only file object drained after every row group"""
+    
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+        self.position = 0
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_parquet(rows: Iterable[tuple]) -> Iterator[bytes]:
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("outlet_name", pa.string()),
+        ("dish_name", pa.string()),
+        ("date", pa.timestamp("us")),
+        ("actual_demand", pa.int64()),
+        ("predicted_demand", pa.int64()),
+        ("weather_factor", pa.float64())
+    ])
+    sink = ParquetChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in iter_chunks(rows, EXPORT_CHUNK_ROWS):
+        # One row group per chunk, flushed to the client before reading the next
+        columns = list(zip(*chunk))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+# Bulk import settings
+IMPORT_SPOOL_BYTES = int(os.getenv("IMPORT_SPOOL_BYTES", 8 * 1024 * 1024))
+IMPORT_MAX_REJECTED_REPORTED = 100
+
+# Accepted column names for imported files, mapped to internal names
+IMPORT_COLUMN_ALIASES = {
+    "outlet": "outlet", "outlet_name": "outlet",
+    "dish": "dish", "dish_name": "dish",
+    "date": "date",
+    "actual": "actual", "actual_demand": "actual",
+    "predicted": "predicted", "predicted_demand": "predicted",
+    "weather_factor": "weather_factor"
+}
+IMPORT_REQUIRED_COLUMNS = {"outlet", "dish", "date", "predicted"}
+
+def iter_import_chunks(fileobj, format: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Parse an uploaded CSV or Parquet file into chunks of normalized records"""
+    if format == "parquet":
+        parquet_file = pq.ParquetFile(fileobj)
+        names = [IMPORT_COLUMN_ALIASES.get(name.strip().lower()) for name in parquet_file.schema_arrow.names]
+        batches = (
+            [dict(zip(names, values)) for values in zip(*[column.to_pylist() for column in batch.columns])]
+            for batch in parquet_file.iter_batches(batch_size=chunk_size)
+        )
+    else:
+        reader = csv.reader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [IMPORT_COLUMN_ALIASES.get(name.strip().lower()) for name in header]
+        batches = iter_chunks((dict(zip(names, values)) for values in reader), chunk_size)
+    
+    missing = IMPORT_REQUIRED_COLUMNS - set(names)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+    
+    yield from batches
+
+def parse_demand_value(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    return int(float(value))
+
+class DemandImporter:
+    """Resolve outlet/dish names from in-memory maps and bulk-load demand rows"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.outlets = {name.strip().lower(): id for id, name in db.query(Outlet.id, Outlet.name)}
+        self.dishes = {name.strip().lower(): id for id, name in db.query(Dish.id, Dish.name)}
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.rows_rejected = 0
+        self.rejected = []
+        self.started = time.perf_counter()
+    
+    def reject(self, line: int, reason: str):
+        self.rows_rejected += 1
+        if len(self.rejected) < IMPORT_MAX_REJECTED_REPORTED:
+            self.rejected.append({"line": line, "reason": reason})
+    
+    def resolve(self, record: Dict[str, Any], line: int) -> Optional[Dict[str, Any]]:
+        outlet_id = self.outlets.get(str(record.get("outlet") or "").strip().lower())
+        if outlet_id is None:
+            self.reject(line, f"Unknown outlet: {record.get('outlet')}")
+            return None
+        dish_id = self.dishes.get(str(record.get("dish") or "").strip().lower())
+        if dish_id is None:
+            self.reject(line, f"Unknown dish: {record.get('dish')}")
+            return None
+        
+        try:
+            row_date = record["date"]
+            if not isinstance(row_date, datetime):
+                row_date = datetime.fromisoformat(str(row_date).strip())
+            predicted = parse_demand_value(record.get("predicted"))
+            if predicted is None:
+                raise ValueError("predicted demand is required")
+            weather_factor = record.get("weather_factor")
+            return {
+                "outlet_id": outlet_id,
+                "dish_id": dish_id,
+                "date": row_date,
+                "actual_demand": parse_demand_value(record.get("actual")),
+                "predicted_demand": predicted,
+                "weather_factor": float(weather_factor) if weather_factor not in (None, "") else 1.0,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
+        except (TypeError, ValueError) as e:
+            self.reject(line, f"Invalid value: {e}")
+            return None
+    
+    def drop_duplicates(self, resolved: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Reject rows whose (outlet_id, dish_id, date) is already stored or earlier in the chunk.
+        
+        Earlier chunks are committed before the next one is checked, so
+        repeats anywhere in the file, or from a previous import, are caught.
+        """
+        if not resolved:
+            return []
+        rows = [row for _, row in resolved]
+        dates = [row["date"] for row in rows]
+        stored = set(
+            tuple(key) for key in self.db.query(DemandData.outlet_id, DemandData.dish_id, DemandData.date).filter(
+                DemandData.date >= min(dates),
+                DemandData.date <= max(dates),
+                DemandData.outlet_id.in_({row["outlet_id"] for row in rows}),
+                DemandData.dish_id.in_({row["dish_id"] for row in rows})
+            )
+        )
+        
+        kept, first_lines = [], {}
+        for line, row in resolved:
+            key = (row["outlet_id"], row["dish_id"], row["date"])
+            if key in stored:
+                self.reject(line, "Duplicate: a row for this outlet, dish and date already exists")
+            elif key in first_lines:
+                self.reject(line, f"Duplicate of line {first_lines[key]}")
+            else:
+                first_lines[key] = line
+                kept.append(row)
+        return kept
+    
+    def load(self, rows: List[Dict[str, Any]]):
+        """Insert a resolved chunk with COPY on PostgreSQL, batched inserts elsewhere"""
+        if not rows:
+            return
+        version = bump_dataset_version(self.db)
+        for row in rows:
+            row["version"] = version
+        if engine.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            columns = list(rows[0].keys())
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(["" if row[column] is None else row[column] for column in columns])
+            buffer.seek(0)
+            cursor = self.db.connection().connection.cursor()
+            cursor.copy_expert(
+                f"COPY demand_data ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        else:
+            self.db.execute(insert(DemandData), rows)
+        self.db.commit()
+        self.rows_imported += len(rows)
+    
+    def run(self, chunks: Iterable[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        line = 1  # header line for CSV files
+        for chunk in chunks:
+            resolved = []
+            for record in chunk:
+                line += 1
+                self.rows_read += 1
+                row = self.resolve(record, line)
+                if row:
+                    resolved.append((line, row))
+            self.load(self.drop_duplicates(resolved))
+        return self.result()
+    
+    def result(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows_read": self.rows_read,
+            "rows_imported": self.rows_imported,
+            "rows_rejected": self.rows_rejected,
+            "rejected": self.rejected,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_imported / elapsed, 1) if elapsed > 0 else None
+        }
+
+@profiled_thread
+def import_demand_file(fileobj, format: str = "csv", chunk_size: int = 5000) -> Dict[str, Any]:
+    """Import historical POS demand from a CSV or Parquet file object"""
+    if format == "parquet" and pa is None:
+        raise ValueError("Parquet import requires pyarrow")
+    
+    db = SessionLocal()
+    try:
+        importer = DemandImporter(db)
+        return importer.run(iter_import_chunks(fileobj, format, chunk_size))
+    finally:
+        db.close()
+        # Chunks are committed as they load, so even a failed import changed data
+        refresh_demand_rollup()
+        invalidate_demand_caches()
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -259,6 +1007,13 @@ async def root():
         "database": "connected" if engine else "demo_mode"
     }
 
+@app.middleware("http")
+async def add_dataset_version_header(request: Request, call_next):
+    response = await call_next(request)
+    # Handlers that read the version before their query have set it already
+    response.headers.setdefault("X-Dataset-Version", str(current_dataset_version()))
+    return response
+
 @app.get("/health")
 async def health_check():
     db_status = "connected" if engine else "demo_mode"
@@ -266,7 +1021,8 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.utcnow(),
         "database": db_status,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "dataset_version": current_dataset_version()
     }
 
 @app.post("/auth/register", response_model=UserResponse)
@@ -353,59 +1109,358 @@ async def get_dishes():
         # Fallback to sample data
         return [DishResponse(**dish) for dish in SAMPLE_DISHES]
 
-@app.get("/demand-data", response_model=List[DemandDataResponse])
+@app.get("/demand-data", response_model=Union[List[DemandDataResponse], DemandCompactResponse, DemandDeltaResponse])
 async def get_demand_data(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     outlet_id: Optional[int] = None,
-    dish_id: Optional[int] = None
+    dish_id: Optional[int] = None,
+    since_version: Optional[int] = Query(None, ge=0),
+    since: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    format: str = Query("rows", pattern="^(rows|compact|ndjson)$"),
+    chunk_rows: Optional[int] = Query(None, ge=100, le=100000)
 ):
+    selected = parse_demand_fields(fields)
+    
+    if since_version is not None or since is not None:
+        return await get_demand_delta(start_date, end_date, outlet_id, dish_id, since_version, since, selected)
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            profiled_iter(stream_demand_ndjson(start_date, end_date, outlet_id, dish_id, selected,
+                                               chunk_rows or STREAM_CHUNK_ROWS)),
+            media_type="application/x-ndjson"
+        )
+    
     if not engine:
         # Return sample data if no database
         sample_data = generate_sample_demand_data()
         return [DemandDataResponse(**item) for item in sample_data]
     
+    # Version before rows, as for deltas: rows written meanwhile are re-sent by the next delta
+    version = current_dataset_version()
+    cache_key = query_cache_key("demand-data", start_date, end_date, outlet_id, dish_id, format, ",".join(selected))
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
     try:
         db = SessionLocal()
-        query = db.query(
-            DemandData.id,
-            Outlet.name.label("outlet_name"),
-            Dish.name.label("dish_name"),
-            DemandData.date,
-            DemandData.actual_demand,
-            DemandData.predicted_demand,
-            DemandData.weather_factor
-        ).join(Outlet).join(Dish)
-        
-        if start_date:
-            query = query.filter(DemandData.date >= start_date)
-        if end_date:
-            query = query.filter(DemandData.date <= end_date)
-        if outlet_id:
-            query = query.filter(DemandData.outlet_id == outlet_id)
-        if dish_id:
-            query = query.filter(DemandData.dish_id == dish_id)
+        if format == "compact":
+            payload = compact_demand_payload(db, start_date, end_date, outlet_id, dish_id, selected, version)
+        else:
+            results = build_demand_query(db, start_date, end_date, outlet_id, dish_id, selected).all()
+            payload = [demand_row_dict(row) for row in results]
+        db.close()
+        
+        response = cache_store(cache_key, payload)
+        response.headers["X-Dataset-Version"] = str(version)
+        return response
+    except Exception as e:
+        logger.error(f"Error fetching demand data: {e}")
+        # Sample rows here would be cached by clients as this dataset version
+        raise HTTPException(status_code=500, detail="Failed to fetch demand data")
+
+def demand_row_dict(row) -> Dict[str, Any]:
+    return dict(row._mapping)
+
+def compact_demand_columns(fields: List[str]) -> List[str]:
+    """Fields with outlet and dish names swapped for their ids"""
+    columns = []
+    for name in fields:
+        name = {"outlet_name": "outlet_id", "dish_name": "dish_id"}.get(name, name)
+        if name not in columns:
+            columns.append(name)
+    return columns
+
+def demand_name_lookups(db: Session, columns: List[str]) -> Dict[str, Dict[int, str]]:
+    """Outlet and dish id -> name tables for the id columns present"""
+    return {
+        "outlets": {row.id: row.name for row in db.query(Outlet.id, Outlet.name)} if "outlet_id" in columns else {},
+        "dishes": {row.id: row.name for row in db.query(Dish.id, Dish.name)} if "dish_id" in columns else {}
+    }
+
+def compact_demand_payload(db: Session, start_date, end_date, outlet_id, dish_id,
+                           fields: List[str], version: Optional[int] = None) -> Dict[str, Any]:
+    """Column arrays with outlet and dish names replaced by ids plus one lookup table each
+    
+    version is the dataset version read before the query; clients label the rows with it.
+    """
+    columns = compact_demand_columns(fields)
+    
+    results = build_demand_query(db, start_date, end_date, outlet_id, dish_id, columns).all()
+    values = [list(column) for column in zip(*results)] or [[] for _ in columns]
+    
+    return {
+        "format": "compact",
+        "version": version,
+        "count": len(results),
+        "columns": dict(zip(columns, values)),
+        **demand_name_lookups(db, columns)
+    }
+
+# Rows per line of a /demand-data?format=ndjson stream
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 5000))
+
+def ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, default=json_default, separators=(",", ":")).encode() + b"\n"
+
+def stream_demand_ndjson(start_date, end_date, outlet_id, dish_id,
+                         fields: List[str], chunk_rows: int) -> Iterator[bytes]:
+    """Compact demand columns as NDJSON, newest rows first.
+    
+    The first line is a header with the dataset version, expected row count,
+    column names and name lookups; each following line holds up to
+    chunk_rows rows as column arrays. A failure mid-stream ends it with an
+    error line, since the status code has already been sent.
+    """
+    if not engine:
+        rows = generate_sample_demand_data()
+        columns = [name for name in fields if rows and name in rows[0]]
+        yield ndjson_line({"type": "header", "version": 0, "count": len(rows), "columns": columns,
+                           "outlets": {}, "dishes": {}})
+        yield ndjson_line({"type": "chunk", "columns": {name: [row[name] for row in rows] for name in columns}})
+        return
+    
+    columns = compact_demand_columns(fields)
+    db = SessionLocal()
+    try:
+        # Version first, as for deltas: rows written meanwhile are re-sent by the next delta
+        version = current_dataset_version()
+        query = build_demand_query(db, start_date, end_date, outlet_id, dish_id, columns)
+        yield ndjson_line({"type": "header", "version": version, "count": query.order_by(None).count(),
+                           "columns": columns, **demand_name_lookups(db, columns)})
+        
+        rows = query.order_by(DemandData.date.desc(), DemandData.id.desc())
+        for chunk in iter_chunks(rows.execution_options(stream_results=True).yield_per(chunk_rows), chunk_rows):
+            yield ndjson_line({"type": "chunk", "columns": dict(zip(columns, map(list, zip(*chunk))))})
+    except Exception as e:
+        logger.error(f"Error streaming demand data: {e}")
+        yield ndjson_line({"type": "error", "detail": "Failed to stream demand data"})
+    finally:
+        db.close()
+
+async def get_demand_delta(start_date, end_date, outlet_id, dish_id,
+                           since_version: Optional[int], since: Optional[datetime],
+                           fields: List[str]):
+    """Rows written and ids deleted after since_version (or the since timestamp)"""
+    
+    if not engine:
+        return {
+            "version": 0,
+            "since_version": since_version,
+            "full_refresh": True,
+            "upserts": generate_sample_demand_data(),
+            "deletes": []
+        }
+    
+    # Read the version before the rows so nothing written in between is missed;
+    # rows newer than it are simply sent again on the next delta
+    dataset_version_memo["version"] = None
+    version = current_dataset_version()
+    
+    cache_key = query_cache_key("demand-delta", start_date, end_date, outlet_id, dish_id, since_version, since, ",".join(fields))
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    try:
+        db = SessionLocal()
+        pruned = db.query(
+            DatasetVersion.tombstones_pruned_version,
+            DatasetVersion.tombstones_pruned_before
+        ).filter(DatasetVersion.id == 1).one()
+        if (since_version is not None and since_version < (pruned.tombstones_pruned_version or 0)) or \
+                (since is not None and pruned.tombstones_pruned_before and since < pruned.tombstones_pruned_before):
+            # Deletes this client hasn't seen may already be pruned
+            db.close()
+            return {
+                "version": version,
+                "since_version": since_version,
+                "full_refresh": True,
+                "upserts": [],
+                "deletes": []
+            }
         
-        results = query.all()
+        query = build_demand_query(db, start_date, end_date, outlet_id, dish_id, fields)
+        tombstones = db.query(DemandTombstone.demand_id)
+        if since_version is not None:
+            query = query.filter(DemandData.version > since_version)
+            tombstones = tombstones.filter(DemandTombstone.version > since_version)
+        if since is not None:
+            query = query.filter(DemandData.updated_at > since)
+            tombstones = tombstones.filter(DemandTombstone.deleted_at > since)
+        
+        upserts = [demand_row_dict(row) for row in query.all()]
+        deletes = [row.demand_id for row in tombstones.all()]
         db.close()
         
-        return [
-            DemandDataResponse(
-                id=row.id,
-                outlet_name=row.outlet_name,
-                dish_name=row.dish_name,
-                date=row.date,
-                actual_demand=row.actual_demand,
-                predicted_demand=row.predicted_demand,
-                weather_factor=row.weather_factor
+        return cache_store(cache_key, {
+            "version": version,
+            "since_version": since_version,
+            "full_refresh": False,
+            "upserts": upserts,
+            "deletes": deletes
+        })
+    except Exception as e:
+        logger.error(f"Error fetching demand delta: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch demand changes")
+
+# Snapshot responses never change for a given version, so clients and CDNs may keep them forever
+SNAPSHOT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@app.get("/snapshots/latest/demand-data")
+async def get_latest_demand_snapshot(request: Request):
+    """Redirect to the immutable snapshot URL for the current dataset version"""
+    url = f"/snapshots/{current_dataset_version()}/demand-data"
+    if request.url.query:
+        url += f"?{request.url.query}"
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-cache"})
+
+@app.get("/snapshots/{version}/demand-data", response_model=Union[List[DemandDataResponse], DemandCompactResponse])
+async def get_demand_snapshot(
+    version: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    outlet_id: Optional[int] = None,
+    dish_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    format: str = Query("rows", pattern="^(rows|compact)$")
+):
+    """Demand data as of a dataset version; only the current version can be served"""
+    
+    if not engine:
+        raise HTTPException(status_code=404, detail="Snapshots are not available in demo mode")
+    
+    dataset_version_memo["version"] = None
+    if version != current_dataset_version():
+        raise HTTPException(status_code=410, detail=f"Snapshot {version} is gone; current version is {current_dataset_version()}")
+    
+    selected = parse_demand_fields(fields)
+    cache_key = query_cache_key("demand-snapshot", start_date, end_date, outlet_id, dish_id, format, ",".join(selected))
+    response = cache_lookup(cache_key)
+    if response is None:
+        # No sample-data fallback here: whatever is returned may be kept forever
+        try:
+            db = SessionLocal()
+            try:
+                if format == "compact":
+                    payload = compact_demand_payload(db, start_date, end_date, outlet_id, dish_id, selected, version)
+                else:
+                    results = build_demand_query(db, start_date, end_date, outlet_id, dish_id, selected).all()
+                    payload = [demand_row_dict(row) for row in results]
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error reading demand snapshot: {e}")
+            raise HTTPException(status_code=500, detail="Failed to read demand snapshot")
+        
+        # Data may have changed while it was read; never label or cache it with the old version
+        dataset_version_memo["version"] = None
+        if version != current_dataset_version():
+            raise HTTPException(status_code=410, detail=f"Snapshot {version} changed while being read; retry")
+        response = cache_store(cache_key, payload)
+    
+    response.headers["Cache-Control"] = SNAPSHOT_CACHE_CONTROL
+    return response
+
+@app.get("/demand-data/series")
+async def get_demand_series(
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    outlet_id: Optional[int] = None,
+    dish_id: Optional[int] = None
+):
+    """Demand totals per time bucket, gap-filled so every bucket in range is present"""
+    
+    if not engine:
+        return demand_series_calendar(bucket, start_date, end_date, {})
+    
+    cache_key = query_cache_key("demand-series", bucket, start_date, end_date, outlet_id, dish_id)
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    # Whole-day ranges are summed from the daily rollup instead of raw rows
+    days = rollup_days(start_date, end_date)
+    use_rollup = days is not None and await run_in_threadpool(refresh_demand_rollup) is not None
+    
+    try:
+        db = SessionLocal()
+        if use_rollup:
+            first_day, last_day = days
+            bucket_column = date_bucket(DemandRollup.day, bucket).label("bucket")
+            query = db.query(
+                bucket_column,
+                func.sum(DemandRollup.predicted_sum).label("predicted_demand"),
+                # NULL like SUM(actual_demand) when no row in the bucket has an actual
+                case((func.sum(DemandRollup.actual_count) > 0, func.sum(DemandRollup.actual_sum))).label("actual_demand"),
+                func.sum(DemandRollup.row_count).label("records")
             )
-            for row in results
-        ]
+            if first_day:
+                query = query.filter(DemandRollup.day >= first_day)
+            if last_day:
+                query = query.filter(DemandRollup.day <= last_day)
+            if outlet_id:
+                query = query.filter(DemandRollup.outlet_id == outlet_id)
+            if dish_id:
+                query = query.filter(DemandRollup.dish_id == dish_id)
+        else:
+            bucket_column = date_bucket(DemandData.date, bucket).label("bucket")
+            query = db.query(
+                bucket_column,
+                func.sum(DemandData.predicted_demand).label("predicted_demand"),
+                func.sum(DemandData.actual_demand).label("actual_demand"),
+                func.count(DemandData.id).label("records")
+            )
+            if start_date:
+                query = query.filter(DemandData.date >= start_date)
+            if end_date:
+                query = query.filter(DemandData.date <= end_date)
+            if outlet_id:
+                query = query.filter(DemandData.outlet_id == outlet_id)
+            if dish_id:
+                query = query.filter(DemandData.dish_id == dish_id)
+        
+        rows = query.group_by(bucket_column).all()
+        db.close()
+        
+        # Generated calendar so missing buckets show up as zero instead of being skipped
+        totals = {bucket_start(row.bucket, bucket): row for row in rows}
+        return cache_store(cache_key, demand_series_calendar(bucket, start_date, end_date, totals))
     except Exception as e:
-        logger.error(f"Error fetching demand data: {e}")
-        # Fallback to sample data
-        sample_data = generate_sample_demand_data()
-        return [DemandDataResponse(**item) for item in sample_data]
+        logger.error(f"Error fetching demand series: {e}")
+        return []
+
+@app.get("/export/demand")
+@profiled_thread
+def export_demand_data(
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    outlet_id: Optional[int] = None,
+    dish_id: Optional[int] = None
+):
+    """Stream demand data as a CSV or Parquet download in constant memory"""
+    
+    if format == "parquet" and pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow on the server")
+    
+    rows = iter_export_rows(start_date, end_date, outlet_id, dish_id)
+    filename = f"kkcg_demand_{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    
+    if format == "parquet":
+        content, media_type = stream_parquet(rows), "application/vnd.apache.parquet"
+    else:
+        content, media_type = stream_csv(rows), "text/csv"
+    
+    return StreamingResponse(
+        profiled_iter(content),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @app.get("/analytics/summary")
 async def get_analytics_summary():
@@ -419,7 +1474,9 @@ async def get_analytics_summary():
             "total_records": 350,
             "avg_daily_demand": 125.5,
             "peak_demand": 295,
-            "total_weekly_demand": 43925
+            "total_weekly_demand": 43925,
+            "first_date": None,
+            "last_date": None
         }
     
     try:
@@ -428,6 +1485,8 @@ async def get_analytics_summary():
         total_outlets = db.query(Outlet).filter(Outlet.is_active == 1).count()
         total_dishes = db.query(Dish).filter(Dish.is_active == 1).count()
         total_records = db.query(DemandData).count()
+        # Lets pages bound date pickers without downloading the data
+        first_date, last_date = db.query(func.min(DemandData.date), func.max(DemandData.date)).one()
         
         # Get recent demand data
         recent_data = db.query(DemandData).order_by(DemandData.date.desc()).limit(1000).all()
@@ -450,7 +1509,9 @@ async def get_analytics_summary():
             "total_records": total_records,
             "avg_daily_demand": round(avg_daily_demand, 1),
             "peak_demand": peak_demand,
-            "total_weekly_demand": total_weekly_demand
+            "total_weekly_demand": total_weekly_demand,
+            "first_date": first_date,
+            "last_date": last_date
         }
     except Exception as e:
         logger.error(f"Error fetching analytics: {e}")
@@ -461,9 +1522,680 @@ async def get_analytics_summary():
             "total_records": 350,
             "avg_daily_demand": 125.5,
             "peak_demand": 295,
-            "total_weekly_demand": 43925
+            "total_weekly_demand": 43925,
+            "first_date": None,
+            "last_date": None
         }
 
+# Window length in days for period comparisons
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30}
+
+# Metrics that analytics endpoints are allowed to aggregate
+DEMAND_METRICS = {
+    "predicted_demand": DemandData.predicted_demand,
+    "actual_demand": DemandData.actual_demand,
+}
+
+# The same metrics in the daily rollup: their per-day sum and how many rows it adds up
+ROLLUP_METRICS = {
+    "predicted_demand": (DemandRollup.predicted_sum, DemandRollup.row_count),
+    "actual_demand": (DemandRollup.actual_sum, DemandRollup.actual_count),
+}
+
+@app.get("/analytics/compare")
+async def get_period_comparison(
+    period: str = Query("week", pattern="^(day|week|month)$"),
+    group_by: Optional[str] = Query(None, pattern="^(outlet|dish)$"),
+    metric: str = Query("predicted_demand", pattern="^(predicted_demand|actual_demand)$")
+):
+    """Compare the latest period with the one before it, optionally per outlet or dish"""
+    
+    result = {
+        "period": period,
+        "group_by": group_by,
+        "metric": metric,
+        "current_start": None,
+        "previous_start": None,
+        "end": None,
+        "totals": {"current": 0, "previous": 0, "change_pct": None},
+        "groups": []
+    }
+    
+    if not engine:
+        return result
+    
+    cache_key = query_cache_key("analytics-compare", period, group_by, metric)
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    # The windows are whole days, so the daily rollup can answer when it is current
+    use_rollup = await run_in_threadpool(refresh_demand_rollup) is not None
+    
+    try:
+        db = SessionLocal()
+        if use_rollup:
+            day_column, value = DemandRollup.day, ROLLUP_METRICS[metric][0]
+            group_ids = {"outlet": DemandRollup.outlet_id, "dish": DemandRollup.dish_id}
+        else:
+            day_column, value = DemandData.date, DEMAND_METRICS[metric]
+            group_ids = {"outlet": DemandData.outlet_id, "dish": DemandData.dish_id}
+        
+        # Anchor windows on the latest day with data so stale datasets still compare
+        latest = db.query(func.max(day_column)).scalar()
+        if latest is None:
+            db.close()
+            return result
+        
+        days = PERIOD_DAYS[period]
+        window_end = datetime(latest.year, latest.month, latest.day) + timedelta(days=1)
+        current_start = window_end - timedelta(days=days)
+        previous_start = current_start - timedelta(days=days)
+        bounds = [window_end, current_start, previous_start]
+        if use_rollup:
+            bounds = [moment.date() for moment in bounds]
+        end_bound, current_bound, previous_bound = bounds
+        
+        # One pass over both windows using conditional aggregation
+        current_total = func.sum(case((day_column >= current_bound, value), else_=0))
+        previous_total = func.sum(case((day_column < current_bound, value), else_=0))
+        
+        columns = [current_total.label("current"), previous_total.label("previous")]
+        group_model = {"outlet": Outlet, "dish": Dish}.get(group_by)
+        if group_model:
+            columns = [group_model.id, group_model.name] + columns
+        
+        query = db.query(*columns).filter(
+            day_column >= previous_bound,
+            day_column < end_bound
+        )
+        if group_model:
+            query = query.join(group_model, group_ids[group_by] == group_model.id)\
+                .group_by(group_model.id, group_model.name)
+        
+        rows = query.all()
+        db.close()
+        
+        current_sum = sum(row.current or 0 for row in rows)
+        previous_sum = sum(row.previous or 0 for row in rows)
+        
+        result.update({
+            "current_start": current_start,
+            "previous_start": previous_start,
+            "end": window_end,
+            "totals": {
+                "current": current_sum,
+                "previous": previous_sum,
+                "change_pct": percent_change(current_sum, previous_sum)
+            }
+        })
+        if group_model:
+            result["groups"] = sorted(
+                [
+                    {
+                        "id": row.id,
+                        "name": row.name,
+                        "current": row.current or 0,
+                        "previous": row.previous or 0,
+                        "change_pct": percent_change(row.current or 0, row.previous or 0)
+                    }
+                    for row in rows
+                ],
+                key=lambda group: group["current"],
+                reverse=True
+            )
+        
+        return cache_store(cache_key, result)
+    except Exception as e:
+        logger.error(f"Error computing period comparison: {e}")
+        return result
+
+# Aggregates the matrix endpoint can apply per cell
+MATRIX_AGGREGATES = {"mean": func.avg, "sum": func.sum, "max": func.max, "min": func.min}
+
+@app.get("/analytics/matrix")
+async def get_demand_matrix(
+    rows: str = Query("dish", pattern="^(dish|outlet)$"),
+    cols: str = Query("outlet", pattern="^(dish|outlet)$"),
+    agg: str = Query("mean", pattern="^(mean|sum|max|min)$"),
+    metric: str = Query("predicted_demand", pattern="^(predicted_demand|actual_demand)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    top_n: Optional[int] = Query(None, ge=1)
+):
+    """Dense rows x cols matrix of an aggregated metric, flattened row-major with labels"""
+    
+    if rows == cols:
+        raise HTTPException(status_code=400, detail="rows and cols must differ")
+    
+    result = {
+        "rows": rows,
+        "cols": cols,
+        "agg": agg,
+        "metric": metric,
+        "row_ids": [],
+        "row_labels": [],
+        "col_ids": [],
+        "col_labels": [],
+        "values": []
+    }
+    
+    if not engine:
+        return result
+    
+    cache_key = query_cache_key("analytics-matrix", rows, cols, agg, metric, start_date, end_date, top_n)
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    # Sums and means over whole days come from the daily rollup; it has no max or min
+    days = rollup_days(start_date, end_date) if agg in ("mean", "sum") else None
+    use_rollup = days is not None and await run_in_threadpool(refresh_demand_rollup) is not None
+    
+    try:
+        db = SessionLocal()
+        
+        filters = []
+        if use_rollup:
+            first_day, last_day = days
+            id_columns = {"dish": DemandRollup.dish_id, "outlet": DemandRollup.outlet_id}
+            value_sum, value_count = ROLLUP_METRICS[metric]
+            total = func.sum(value_sum)
+            cell_value = total if agg == "sum" else total * 1.0 / func.nullif(func.sum(value_count), 0)
+            if first_day:
+                filters.append(DemandRollup.day >= first_day)
+            if last_day:
+                filters.append(DemandRollup.day <= last_day)
+        else:
+            id_columns = {"dish": DemandData.dish_id, "outlet": DemandData.outlet_id}
+            value = DEMAND_METRICS[metric]
+            total = func.sum(value)
+            cell_value = MATRIX_AGGREGATES[agg](value)
+            if start_date:
+                filters.append(DemandData.date >= start_date)
+            if end_date:
+                filters.append(DemandData.date <= end_date)
+        row_id, col_id = id_columns[rows], id_columns[cols]
+        
+        if top_n:
+            # Keep the rows with the largest totals, ranked in the database
+            top_rows = select(row_id).where(*filters).group_by(row_id)\
+                .order_by(total.desc()).limit(top_n)
+            filters.append(row_id.in_(top_rows.scalar_subquery()))
+        
+        cells = db.query(row_id.label("row_id"), col_id.label("col_id"), cell_value.label("value"))\
+            .filter(*filters).group_by(row_id, col_id).all()
+        
+        models = {"dish": Dish, "outlet": Outlet}
+        row_ids = {cell.row_id for cell in cells}
+        col_ids = {cell.col_id for cell in cells}
+        row_names = db.query(models[rows].id, models[rows].name).filter(models[rows].id.in_(row_ids)).all() if row_ids else []
+        col_names = db.query(models[cols].id, models[cols].name).filter(models[cols].id.in_(col_ids)).all() if col_ids else []
+        db.close()
+        
+        # Labels sorted by name, missing cells filled with 0
+        row_names = sorted(row_names, key=lambda row: row.name)
+        col_names = sorted(col_names, key=lambda col: col.name)
+        row_index = {row.id: i for i, row in enumerate(row_names)}
+        col_index = {col.id: j for j, col in enumerate(col_names)}
+        values = [0.0] * (len(row_names) * len(col_names))
+        for cell in cells:
+            if cell.value is not None and cell.row_id in row_index and cell.col_id in col_index:
+                values[row_index[cell.row_id] * len(col_names) + col_index[cell.col_id]] = float(cell.value)
+        
+        result.update({
+            "row_ids": [row.id for row in row_names],
+            "row_labels": [row.name for row in row_names],
+            "col_ids": [col.id for col in col_names],
+            "col_labels": [col.name for col in col_names],
+            "values": values
+        })
+        
+        return cache_store(cache_key, result)
+    except Exception as e:
+        logger.error(f"Error computing demand matrix: {e}")
+        return result
+
+# Ranking expressions accepted by /analytics/top, e.g. "sum(predicted_demand)"
+RANK_BY_PATTERN = r"^(sum|avg|max|min|count)\((predicted_demand|actual_demand)\)$"
+RANK_AGGREGATES = {"sum": func.sum, "avg": func.avg, "max": func.max, "min": func.min, "count": func.count}
+
+def top_items_select(partition: Optional[str], item: str, rank_by: str, n: int, order: str,
+                     start_date: Optional[datetime], end_date: Optional[datetime]):
+    """Ranked (partition_id, item_id, value, rank) rows for /analytics/top"""
+    aggregate, metric = rank_by.rstrip(")").split("(")
+    id_columns = {"dish": DemandData.dish_id, "outlet": DemandData.outlet_id}
+    item_id = id_columns[item]
+    value = RANK_AGGREGATES[aggregate](DEMAND_METRICS[metric])
+    
+    # Without a partition every item shares partition 0. The constant must stay out
+    # of GROUP BY: PostgreSQL reads "GROUP BY 0" as a column position and rejects it
+    if partition:
+        partition_id = id_columns[partition]
+        group_keys = [partition_id, item_id]
+    else:
+        partition_id = literal(0)
+        group_keys = [item_id]
+    
+    totals = select(partition_id.label("partition_id"), item_id.label("item_id"), value.label("value"))
+    if start_date:
+        totals = totals.where(DemandData.date >= start_date)
+    if end_date:
+        totals = totals.where(DemandData.date <= end_date)
+    totals = totals.group_by(*group_keys).having(value.isnot(None)).subquery()
+    
+    # Ties break on id so ranks are stable between requests
+    ordering = totals.c.value.desc() if order == "desc" else totals.c.value.asc()
+    ranked = select(
+        totals.c.partition_id,
+        totals.c.item_id,
+        totals.c.value,
+        func.row_number().over(partition_by=totals.c.partition_id, order_by=(ordering, totals.c.item_id)).label("rank")
+    ).subquery()
+    
+    return select(ranked).where(ranked.c.rank <= n).order_by(ranked.c.partition_id, ranked.c.rank)
+
+@app.get("/analytics/top")
+async def get_top_items(
+    partition: Optional[str] = Query(None, pattern="^(outlet|dish)$"),
+    item: Optional[str] = Query(None, pattern="^(outlet|dish)$"),
+    rank_by: str = Query("sum(predicted_demand)", pattern=RANK_BY_PATTERN),
+    n: int = Query(5, ge=1, le=100),
+    order: str = Query("desc", pattern="^(desc|asc)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """Top (or bottom) n items per partition, e.g. the best dishes at each outlet"""
+    
+    # Rank the other dimension by default; without a partition rank dishes overall
+    item = item or {"outlet": "dish", "dish": "outlet"}.get(partition, "dish")
+    if item == partition:
+        raise HTTPException(status_code=400, detail="item and partition must differ")
+    
+    result = {
+        "partition": partition,
+        "item": item,
+        "rank_by": rank_by,
+        "order": order,
+        "n": n,
+        "groups": []
+    }
+    
+    if not engine:
+        return result
+    
+    cache_key = query_cache_key("analytics-top", partition, item, rank_by, n, order, start_date, end_date)
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    try:
+        db = SessionLocal()
+        rows = db.execute(top_items_select(partition, item, rank_by, n, order, start_date, end_date)).all()
+        
+        models = {"dish": Dish, "outlet": Outlet}
+        names = {item: dict(db.query(models[item].id, models[item].name).all())}
+        if partition:
+            names[partition] = dict(db.query(models[partition].id, models[partition].name).all())
+        db.close()
+        
+        groups = {}
+        for row in rows:
+            group_id = row.partition_id if partition else None
+            group = groups.setdefault(group_id, {
+                "id": group_id,
+                "name": names[partition].get(group_id) if partition else None,
+                "items": []
+            })
+            group["items"].append({
+                "rank": row.rank,
+                "id": row.item_id,
+                "name": names[item].get(row.item_id),
+                "value": row.value
+            })
+        result["groups"] = list(groups.values())
+        
+        return cache_store(cache_key, result)
+    except Exception as e:
+        logger.error(f"Error ranking top items: {e}")
+        return result
+
+def accuracy_metrics(actual_count, actual_sum, matched_predicted_sum, abs_error_sum,
+                     squared_error_sum, pct_error_sum, pct_count) -> Dict[str, Any]:
+    """Forecast accuracy from rollup sums; None where there are no actuals to compare"""
+    actual_count, actual_sum = actual_count or 0, actual_sum or 0
+    error_sum = (matched_predicted_sum or 0) - actual_sum
+    return {
+        "rows": actual_count,
+        "actual": actual_sum,
+        "predicted": matched_predicted_sum or 0,
+        "mape": round(pct_error_sum / pct_count * 100, 2) if pct_count else None,
+        "wape": round(abs_error_sum / actual_sum * 100, 2) if actual_sum else None,
+        "bias": round(error_sum / actual_count, 2) if actual_count else None,
+        "bias_pct": round(error_sum / actual_sum * 100, 2) if actual_sum else None,
+        "rmse": round(math.sqrt(squared_error_sum / actual_count), 2) if actual_count else None
+    }
+
+@app.get("/analytics/accuracy")
+async def get_forecast_accuracy(
+    group_by: Optional[str] = Query(None, pattern="^(outlet|dish|date)$"),
+    window: int = Query(30, ge=1, le=3660)
+):
+    """MAPE, WAPE, bias and RMSE of predicted vs actual demand over the last window days"""
+    
+    result = {
+        "group_by": group_by,
+        "window": window,
+        "start": None,
+        "end": None,
+        "overall": accuracy_metrics(0, 0, 0, 0, 0, 0, 0),
+        "groups": []
+    }
+    
+    if not engine:
+        return result
+    
+    cache_key = query_cache_key("analytics-accuracy", group_by, window)
+    cached = cache_lookup(cache_key)
+    if cached:
+        return cached
+    
+    # Cheap when nothing changed; keeps the rollup current without a scheduler
+    await run_in_threadpool(refresh_demand_rollup)
+    
+    try:
+        db = SessionLocal()
+        
+        # Anchor the window on the latest day with actuals, like the period comparison
+        latest = db.query(func.max(DemandRollup.day)).filter(DemandRollup.actual_count > 0).scalar()
+        if latest is None:
+            db.close()
+            return result
+        start = latest - timedelta(days=window - 1)
+        
+        sums = [
+            func.sum(DemandRollup.actual_count).label("actual_count"),
+            func.sum(DemandRollup.actual_sum).label("actual_sum"),
+            func.sum(DemandRollup.matched_predicted_sum).label("matched_predicted_sum"),
+            func.sum(DemandRollup.abs_error_sum).label("abs_error_sum"),
+            func.sum(DemandRollup.squared_error_sum).label("squared_error_sum"),
+            func.sum(DemandRollup.pct_error_sum).label("pct_error_sum"),
+            func.sum(DemandRollup.pct_count).label("pct_count")
+        ]
+        group_columns = {
+            "outlet": [Outlet.id, Outlet.name],
+            "dish": [Dish.id, Dish.name],
+            "date": [DemandRollup.day.label("id"), DemandRollup.day.label("name")]
+        }.get(group_by, [])
+        
+        query = db.query(*group_columns, *sums).filter(
+            DemandRollup.actual_count > 0,
+            DemandRollup.day >= start,
+            DemandRollup.day <= latest
+        )
+        if group_by == "outlet":
+            query = query.join(Outlet, DemandRollup.outlet_id == Outlet.id)
+        elif group_by == "dish":
+            query = query.join(Dish, DemandRollup.dish_id == Dish.id)
+        if group_columns:
+            query = query.group_by(*group_columns)
+        
+        rows = query.all()
+        db.close()
+        
+        def metrics(row):
+            return accuracy_metrics(row.actual_count, row.actual_sum, row.matched_predicted_sum, row.abs_error_sum,
+                                    row.squared_error_sum, row.pct_error_sum, row.pct_count)
+        
+        result.update({
+            "start": start,
+            "end": latest,
+            "overall": accuracy_metrics(*[sum(getattr(row, column.name) or 0 for row in rows) for column in sums])
+        })
+        if group_columns:
+            groups = [{"id": row.id, "name": row.name, **metrics(row)} for row in rows]
+            if group_by == "date":
+                groups.sort(key=lambda group: group["id"])
+            else:
+                # Least accurate first
+                groups.sort(key=lambda group: group["wape"] or 0, reverse=True)
+            result["groups"] = groups
+        
+        return cache_store(cache_key, result)
+    except Exception as e:
+        logger.error(f"Error computing forecast accuracy: {e}")
+        return result
+
+# Forecast runs
+FORECAST_MODEL_VERSION = "baseline-mean-v1"
+FORECAST_WRITE_CHUNK_ROWS = int(os.getenv("FORECAST_WRITE_CHUNK_ROWS", 10000))
+# Half-width of the baseline's 80% interval in RMSEs, and its width without actuals
+FORECAST_INTERVAL_Z = 1.28
+FORECAST_DEFAULT_SPREAD = 0.15
+
+def forecast_run_dict(run: ForecastRun) -> Dict[str, Any]:
+    return {
+        "run_id": run.run_id,
+        "model_version": run.model_version,
+        "status": run.status,
+        "dataset_version": run.dataset_version,
+        "start_date": run.start_date,
+        "horizon_days": run.horizon_days,
+        "row_count": run.row_count,
+        "created_at": run.created_at,
+        "completed_at": run.completed_at
+    }
+
+@profiled_thread
+def store_forecast_run(model_version: str, points: Iterable[Dict[str, Any]],
+                       horizon_days: Optional[int] = None,
+                       dataset_version: Optional[int] = None) -> Dict[str, Any]:
+    """Write a forecast run in committed chunks, marking it complete only once all rows are in"""
+    db = SessionLocal()
+    run = ForecastRun(
+        run_id=uuid.uuid4().hex,
+        model_version=model_version,
+        status="running",
+        dataset_version=dataset_version,
+        horizon_days=horizon_days
+    )
+    db.add(run)
+    db.commit()
+    
+    try:
+        row_count = 0
+        start_date = None
+        for chunk in iter_chunks(points, FORECAST_WRITE_CHUNK_ROWS):
+            db.execute(insert(Forecast), [
+                {"model_version": model_version, "run_id": run.run_id, **point} for point in chunk
+            ])
+            db.commit()
+            row_count += len(chunk)
+            first = min(point["target_date"] for point in chunk)
+            start_date = first if start_date is None else min(start_date, first)
+        
+        run.status = "complete"
+        run.row_count = row_count
+        run.start_date = start_date
+        run.completed_at = datetime.utcnow()
+        db.commit()
+        return forecast_run_dict(run)
+    except Exception:
+        db.rollback()
+        run.status = "failed"
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+@profiled_thread
+def compute_baseline_forecasts(horizon_days: int = 30, lookback_days: int = 28) -> Dict[str, Any]:
+    """Forecast every outlet and dish series from its recent daily mean.
+    
+    Series with actuals forecast their mean actual demand with an interval of
+    FORECAST_INTERVAL_Z RMSEs; others fall back to the mean prediction +/- 15%.
+    """
+    if refresh_demand_rollup() is None:
+        raise RuntimeError("Demand rollup is unavailable")
+    
+    db = SessionLocal()
+    try:
+        dataset_version = db.query(DatasetVersion.rollup_version).filter(DatasetVersion.id == 1).scalar()
+        latest = db.query(func.max(DemandRollup.day)).scalar()
+        if latest is None:
+            return {"run": None, "series": 0}
+        
+        series = db.query(
+            DemandRollup.outlet_id,
+            DemandRollup.dish_id,
+            func.count(DemandRollup.day).label("days"),
+            func.sum(DemandRollup.predicted_sum).label("predicted_sum"),
+            func.count(case((DemandRollup.actual_count > 0, 1))).label("actual_days"),
+            func.sum(DemandRollup.actual_sum).label("actual_sum"),
+            func.sum(DemandRollup.actual_count).label("actual_count"),
+            func.sum(DemandRollup.squared_error_sum).label("squared_error_sum")
+        ).filter(
+            DemandRollup.day > latest - timedelta(days=lookback_days)
+        ).group_by(DemandRollup.outlet_id, DemandRollup.dish_id).all()
+    finally:
+        db.close()
+    
+    def points():
+        for row in series:
+            if row.actual_days:
+                point = row.actual_sum / row.actual_days
+                spread = FORECAST_INTERVAL_Z * math.sqrt(row.squared_error_sum / row.actual_count)
+            else:
+                point = row.predicted_sum / row.days
+                spread = point * FORECAST_DEFAULT_SPREAD
+            for offset in range(1, horizon_days + 1):
+                yield {
+                    "outlet_id": row.outlet_id,
+                    "dish_id": row.dish_id,
+                    "target_date": latest + timedelta(days=offset),
+                    "predicted": round(point, 1),
+                    "lower": round(max(0.0, point - spread), 1),
+                    "upper": round(point + spread, 1)
+                }
+    
+    run = store_forecast_run(FORECAST_MODEL_VERSION, points(), horizon_days, dataset_version)
+    return {"run": run, "series": len(series)}
+
+@app.post("/forecasts/runs")
+async def create_forecast_run(forecast_run: ForecastRunCreate):
+    """Store a batch of forecasts produced by an external model as a new run"""
+    
+    if not engine:
+        raise HTTPException(status_code=503, detail="Forecast runs need a database")
+    
+    points = [point.model_dump() for point in forecast_run.forecasts]
+    if not points:
+        raise HTTPException(status_code=400, detail="A forecast run needs at least one forecast")
+    horizon_days = len({point["target_date"] for point in points})
+    
+    try:
+        return await run_in_threadpool(
+            store_forecast_run, forecast_run.model_version, points, horizon_days, current_dataset_version()
+        )
+    except Exception as e:
+        logger.error(f"Error storing forecast run: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store forecast run")
+
+@app.post("/forecasts/runs/baseline")
+async def create_baseline_forecast_run(
+    horizon_days: int = Query(30, ge=1, le=365),
+    lookback_days: int = Query(28, ge=1, le=3660)
+):
+    """Compute and store baseline forecasts for every outlet and dish"""
+    
+    if not engine:
+        raise HTTPException(status_code=503, detail="Forecast runs need a database")
+    
+    try:
+        return await run_in_threadpool(compute_baseline_forecasts, horizon_days, lookback_days)
+    except Exception as e:
+        logger.error(f"Error computing baseline forecasts: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute forecasts")
+
+@app.get("/forecasts/runs")
+async def list_forecast_runs(
+    model_version: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Most recent forecast runs, newest first"""
+    
+    if not engine:
+        return []
+    
+    db = SessionLocal()
+    try:
+        query = db.query(ForecastRun)
+        if model_version:
+            query = query.filter(ForecastRun.model_version == model_version)
+        runs = query.order_by(ForecastRun.created_at.desc()).limit(limit).all()
+        return [forecast_run_dict(run) for run in runs]
+    finally:
+        db.close()
+
+@app.get("/forecasts/latest")
+async def get_latest_forecasts(
+    model_version: Optional[str] = None,
+    horizon_days: Optional[int] = Query(None, ge=1),
+    outlet_id: Optional[int] = None,
+    dish_id: Optional[int] = None
+):
+    """Forecasts from the most recently completed run, optionally for one model version"""
+    
+    result = {"run": None, "forecasts": []}
+    if not engine:
+        return result
+    
+    try:
+        db = SessionLocal()
+        query = db.query(ForecastRun).filter(ForecastRun.status == "complete")
+        if model_version:
+            query = query.filter(ForecastRun.model_version == model_version)
+        run = query.order_by(ForecastRun.completed_at.desc()).first()
+        if run is None:
+            db.close()
+            return result
+        
+        # A run never changes once complete, so its id makes the cache key
+        cache_key = query_cache_key("forecasts-latest", run.run_id, horizon_days, outlet_id, dish_id)
+        cached = cache_lookup(cache_key)
+        if cached:
+            db.close()
+            return cached
+        
+        query = db.query(
+            Forecast.outlet_id,
+            Forecast.dish_id,
+            Outlet.name.label("outlet_name"),
+            Dish.name.label("dish_name"),
+            Forecast.target_date,
+            Forecast.predicted,
+            Forecast.lower,
+            Forecast.upper
+        ).join(Outlet, Forecast.outlet_id == Outlet.id).join(Dish, Forecast.dish_id == Dish.id).filter(
+            Forecast.model_version == run.model_version,
+            Forecast.run_id == run.run_id
+        )
+        if horizon_days and run.start_date:
+            query = query.filter(Forecast.target_date < run.start_date + timedelta(days=horizon_days))
+        if outlet_id:
+            query = query.filter(Forecast.outlet_id == outlet_id)
+        if dish_id:
+            query = query.filter(Forecast.dish_id == dish_id)
+        
+        rows = query.order_by(Forecast.target_date, Forecast.outlet_id, Forecast.dish_id).all()
+        result = {"run": forecast_run_dict(run), "forecasts": [dict(row._mapping) for row in rows]}
+        db.close()
+        
+        return cache_store(cache_key, result)
+    except Exception as e:
+        logger.error(f"Error fetching latest forecasts: {e}")
+        return result
+
 @app.post("/seed-data")
 async def seed_database():
     """Seed the database with sample data"""
@@ -501,7 +2233,13 @@ async def seed_database():
         outlets = db.query(Outlet).all()
         dishes = db.query(Dish).all()
         
-        # Clear existing demand data
+        version = bump_dataset_version(db)
+        
+        # Clear existing demand data, leaving tombstones for delta clients
+        db.execute(insert(DemandTombstone).from_select(
+            ["demand_id", "version", "deleted_at"],
+            select(DemandData.id, literal(version), literal(datetime.utcnow()))
+        ))
         db.query(DemandData).delete()
         
         # Generate 7 days of data
@@ -518,18 +2256,24 @@ async def seed_database():
                     
                     predicted_demand = int(base_demand * random.uniform(0.8, 1.2))
                     weather_factor = random.uniform(0.9, 1.1)
+                    # Past days have recorded sales to measure forecasts against
+                    actual_demand = int(predicted_demand * random.uniform(0.85, 1.15)) if i > 0 else None
                     
                     db_demand = DemandData(
                         outlet_id=outlet.id,
                         dish_id=dish.id,
                         date=date,
+                        actual_demand=actual_demand,
                         predicted_demand=predicted_demand,
-                        weather_factor=weather_factor
+                        weather_factor=weather_factor,
+                        version=version
                     )
                     db.add(db_demand)
         
         db.commit()
         db.close()
+        await run_in_threadpool(refresh_demand_rollup)
+        invalidate_demand_caches()
         
         return {"message": "Database seeded successfully with sample data"}
     
@@ -537,6 +2281,246 @@ async def seed_database():
         logger.error(f"Error seeding database: {e}")
         return {"message": f"Database seeding failed: {str(e)}"}
 
+@app.post("/import/demand")
+async def import_demand_data(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    chunk_size: int = Query(5000, ge=100, le=100000)
+):
+    """Bulk import historical demand (outlet, dish, date, actual, predicted) from the request body"""
+    
+    if not engine:
+        return {"message": "Running in demo mode - no database to import into"}
+    
+    # Spool the upload so large files go to disk instead of memory
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        result = await run_in_threadpool(import_demand_file, spool, format, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing demand data: {e}")
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    finally:
+        spool.close()
+    
+    logger.info(f"Imported {result['rows_imported']} demand rows ({result['rows_rejected']} rejected)")
+    return result
+
+# Background jobs. Every worker runs the scheduler; job leases make sure each
+# scheduled occurrence runs on only one of them.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 3600))
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30))
+FORECAST_RUNS_KEEP = int(os.getenv("FORECAST_RUNS_KEEP", 10))
+
+def acquire_job_lease(name: str, owner: str, slot: datetime, lease_seconds: int) -> bool:
+    """Take the lease for one scheduled occurrence of a job; False if another worker has it"""
+    db = SessionLocal()
+    try:
+        if db.get(JobLease, name) is None:
+            try:
+                db.add(JobLease(name=name))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+        
+        now = datetime.utcnow()
+        # A single conditional UPDATE, so only one worker can win
+        taken = db.query(JobLease).filter(
+            JobLease.name == name,
+            (JobLease.expires_at.is_(None)) | (JobLease.expires_at < now),
+            (JobLease.slot.is_(None)) | (JobLease.slot < slot)
+        ).update(
+            {JobLease.owner: owner, JobLease.expires_at: now + timedelta(seconds=lease_seconds), JobLease.slot: slot},
+            synchronize_session=False
+        )
+        db.commit()
+        return taken == 1
+    finally:
+        db.close()
+
+def release_job_lease(name: str, owner: str):
+    db = SessionLocal()
+    try:
+        db.query(JobLease).filter(JobLease.name == name, JobLease.owner == owner).update(
+            {JobLease.expires_at: None}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def run_rollup_job() -> Dict[str, Any]:
+    result = refresh_demand_rollup()
+    if result is None:
+        raise RuntimeError("Demand rollup refresh failed")
+    return result
+
+def run_forecast_job() -> Dict[str, Any]:
+    """Compute baseline forecasts unless the latest run already covers the current data"""
+    db = SessionLocal()
+    try:
+        latest = db.query(ForecastRun.dataset_version).filter(
+            ForecastRun.model_version == FORECAST_MODEL_VERSION,
+            ForecastRun.status == "complete"
+        ).order_by(ForecastRun.completed_at.desc()).first()
+    finally:
+        db.close()
+    
+    dataset_version_memo["version"] = None
+    if latest is not None and latest.dataset_version == current_dataset_version():
+        return {"run": None, "skipped": "up to date"}
+    return compute_baseline_forecasts()
+
+def run_cache_warm_job() -> Dict[str, Any]:
+    """Compute the dashboards' default responses so the first visitors get cache hits.
+    
+    With the in-process memory cache this only warms the worker that ran the job.
+    """
+    async def warm():
+        await get_demand_data(None, None, None, None, since_version=None, since=None,
+                              fields=",".join(DEMAND_FIELDS), format="compact")
+        await get_period_comparison(period="week", group_by=None, metric="predicted_demand")
+        await get_forecast_accuracy(group_by=None, window=30)
+        await get_latest_forecasts(model_version=None, horizon_days=7, outlet_id=None, dish_id=None)
+    
+    started = time.perf_counter()
+    asyncio.run(warm())
+    return {"seconds": round(time.perf_counter() - started, 3)}
+
+def run_prune_job() -> Dict[str, Any]:
+    """Drop old tombstones and forecast runs beyond FORECAST_RUNS_KEEP per model version"""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        pruned_version = db.query(func.max(DemandTombstone.version)).filter(DemandTombstone.deleted_at < cutoff).scalar()
+        tombstones = 0
+        if pruned_version is not None:
+            # Record the horizon first so deltas from before it fall back to a full refresh
+            state = db.query(DatasetVersion).filter(DatasetVersion.id == 1).with_for_update().one()
+            state.tombstones_pruned_version = max(state.tombstones_pruned_version or 0, pruned_version)
+            state.tombstones_pruned_before = cutoff
+            tombstones = db.query(DemandTombstone).filter(
+                DemandTombstone.version <= pruned_version
+            ).delete(synchronize_session=False)
+            db.commit()
+        
+        # Runs still "running" after a day were abandoned by a crashed worker
+        abandoned_before = datetime.utcnow() - timedelta(days=1)
+        stale_runs = []
+        for (model_version,) in db.query(ForecastRun.model_version).distinct().all():
+            runs = db.query(ForecastRun.run_id, ForecastRun.status, ForecastRun.created_at).filter(
+                ForecastRun.model_version == model_version
+            ).order_by(ForecastRun.created_at.desc()).all()
+            kept = 0
+            for run in runs:
+                if run.status == "complete" and kept < FORECAST_RUNS_KEEP:
+                    kept += 1
+                elif run.status != "running" or run.created_at < abandoned_before:
+                    stale_runs.append(run.run_id)
+        
+        forecasts = 0
+        for run_id in stale_runs:
+            forecasts += db.query(Forecast).filter(Forecast.run_id == run_id).delete(synchronize_session=False)
+            db.query(ForecastRun).filter(ForecastRun.run_id == run_id).delete(synchronize_session=False)
+            db.commit()
+        
+        return {"tombstones": tombstones, "forecast_runs": len(stale_runs), "forecasts": forecasts}
+    finally:
+        db.close()
+
+scheduler = Scheduler(acquire=acquire_job_lease, release=release_job_lease, lease_seconds=JOB_LEASE_SECONDS)
+
+# An empty schedule disables that job
+for job_name, schedule_var, default_schedule, job_func in [
+    ("refresh_rollups", "SCHEDULE_REFRESH_ROLLUPS", "*/15 * * * *", run_rollup_job),
+    ("compute_forecasts", "SCHEDULE_COMPUTE_FORECASTS", "0 2 * * *", run_forecast_job),
+    ("warm_caches", "SCHEDULE_WARM_CACHES", "30 2 * * *", run_cache_warm_job),
+    ("prune", "SCHEDULE_PRUNE", "0 3 * * *", run_prune_job),
+]:
+    job_schedule = os.getenv(schedule_var, default_schedule).strip()
+    if job_schedule:
+        try:
+            scheduler.add_job(job_name, job_schedule, job_func)
+        except ValueError as e:
+            logger.error(f"Invalid {schedule_var}, job {job_name} disabled: {e}")
+
+@app.on_event("startup")
+async def start_scheduler():
+    if SCHEDULER_ENABLED and engine:
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+
+def prometheus_line(name: str, value, labels: Optional[Dict[str, str]] = None) -> str:
+    label_text = ",".join(f'{key}="{label}"' for key, label in (labels or {}).items())
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Scheduler job timings, result cache and dataset version in Prometheus text format"""
+    lines = [
+        "# TYPE kkcg_dataset_version gauge",
+        prometheus_line("kkcg_dataset_version", current_dataset_version()),
+        "# TYPE kkcg_scheduler_enabled gauge",
+        prometheus_line("kkcg_scheduler_enabled", int(SCHEDULER_ENABLED and bool(engine)))
+    ]
+    
+    job_metrics = [
+        ("kkcg_job_runs_total", "counter", "runs"),
+        ("kkcg_job_failures_total", "counter", "failures"),
+        ("kkcg_job_skipped_total", "counter", "skipped"),
+        ("kkcg_job_last_started_timestamp_seconds", "gauge", "last_started"),
+        ("kkcg_job_last_finished_timestamp_seconds", "gauge", "last_finished"),
+        ("kkcg_job_last_duration_seconds", "gauge", "last_duration_seconds"),
+        ("kkcg_job_running", "gauge", "running"),
+    ]
+    jobs = scheduler.stats()
+    for metric_name, metric_type, key in job_metrics:
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        for job in jobs:
+            if job[key] is not None:
+                lines.append(prometheus_line(metric_name, int(job[key]) if isinstance(job[key], bool) else job[key], {"job": job["name"]}))
+    lines.append("# TYPE kkcg_job_last_success gauge")
+    for job in jobs:
+        if job["last_status"] is not None:
+            lines.append(prometheus_line("kkcg_job_last_success", int(job["last_status"] == "ok"), {"job": job["name"]}))
+    
+    try:
+        cache_stats = result_cache.stats()
+    except Exception as e:
+        logger.error(f"Result cache stats failed: {e}")
+        cache_stats = {}
+    for key, value in cache_stats.items():
+        metric_type = "counter" if key in ("hits", "misses", "evictions") else "gauge"
+        metric_name = f"kkcg_result_cache_{key}_total" if metric_type == "counter" else f"kkcg_result_cache_{key}"
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        lines.append(prometheus_line(metric_name, value, {"backend": result_cache.name}))
+    
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles", include_in_schema=PROFILING_ENABLED)
+async def list_profiles():
+    """List recently captured request profiles"""
+    if not profile_store:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return profile_store.list()
+
+@app.get("/debug/profiles/{request_id}", response_class=PlainTextResponse, include_in_schema=PROFILING_ENABLED)
+async def get_profile(request_id: str):
+    """Get a captured profile as collapsed stacks (flamegraph.pl / speedscope)"""
+    if not profile_store:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    profile = profile_store.get(request_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile["collapsed"])
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,223 @@
+"""
+Opt-in request profiler for the KKCG Analytics API.
+
+When enabled, requests carrying an ``X-Profile: 1`` header (or picked by the
+configured sampling rate) are profiled with a lightweight stack sampler. The
+result is stored as collapsed stacks ("frame;frame;frame count" per line),
+which flamegraph.pl, speedscope and most flame-graph viewers import directly.
+
+Only threads working on the profiled request are sampled: the event-loop
+thread that runs the request, plus any worker thread while it runs a
+function marked with ``profiled_thread`` or produces an item of a streamed
+body wrapped in ``profiled_iter``. Async handlers share the loop with
+concurrent requests, so their profiles can include some of that work.
+"""
+
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Sampler of the request being handled, if it is profiled; worker threads
+# started through run_in_threadpool inherit it
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+class StackSampler:
+    """Periodically sample the Python stacks of the threads added to it"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = 0
+        self._counts: Counter = Counter()
+        self._threads: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def add_thread(self, thread_id: int, name: str):
+        self._threads[thread_id] = name
+
+    def remove_thread(self, thread_id: int):
+        self._threads.pop(thread_id, None)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, name in list(self._threads.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self._counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Return the samples in collapsed-stack format"""
+        return "\n".join(f"{stack} {count}" for stack, count in self._counts.most_common())
+
+
+def profiled_thread(fn):
+    """Sample the thread fn runs on while it works for a profiled request
+
+    For sync endpoints and functions handed to run_in_threadpool, which run
+    on worker threads the profiler would otherwise not look at.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        sampler = _active_sampler.get()
+        if sampler is None:
+            return fn(*args, **kwargs)
+        thread = threading.current_thread()
+        sampler.add_thread(thread.ident, thread.name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.remove_thread(thread.ident)
+    return wrapper
+
+
+def profiled_iter(iterator: Iterator[T]) -> Iterator[T]:
+    """Sample whichever thread produces each item, for StreamingResponse bodies
+
+    Starlette consumes sync bodies in the threadpool after the handler has
+    returned, one item per call and not always on the same thread, so
+    profiled_thread on the handler misses them.
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return iterator
+    return _sampled_items(sampler, iterator)
+
+
+def _sampled_items(sampler: "StackSampler", iterator: Iterator[T]) -> Iterator[T]:
+    while True:
+        thread = threading.current_thread()
+        sampler.add_thread(thread.ident, thread.name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            sampler.remove_thread(thread.ident)
+        yield item
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent profiles, optionally mirrored to disk"""
+
+    def __init__(self, max_profiles: int = 100, directory: Optional[str] = None):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def save(self, request_id: str, profile: Dict):
+        with self._lock:
+            self._profiles[request_id] = profile
+            self._profiles.move_to_end(request_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.directory:
+            path = os.path.join(self.directory, f"{request_id}.collapsed")
+            try:
+                with open(path, "w") as handle:
+                    handle.write(profile["collapsed"])
+            except OSError as e:
+                logger.error(f"Failed to write profile {request_id}: {e}")
+
+    def get(self, request_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "collapsed"}
+                for profile in reversed(self._profiles.values())
+            ]
+
+
+class ProfilerMiddleware:
+    """ASGI middleware that profiles requests on demand or by sampling"""
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0,
+                 interval: float = 0.01, header: str = "x-profile"):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header.lower().encode()
+
+    def _should_profile(self, headers: Dict[bytes, bytes]) -> bool:
+        if headers.get(self.header, b"").strip() in (b"1", b"true", b"yes"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        if not self._should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = headers.get(b"x-request-id", b"").decode() or uuid.uuid4().hex
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", request_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        loop_thread = threading.current_thread()
+        sampler.add_thread(loop_thread.ident, loop_thread.name)
+        token = _active_sampler.set(sampler)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            _active_sampler.reset(token)
+            self.store.save(request_id, {
+                "request_id": request_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": sampler.samples,
+                "created_at": time.time(),
+                "collapsed": sampler.collapsed(),
+            })
@@ -0,0 +1,225 @@
+"""
+In-process job scheduler for the KKCG Analytics API.
+
+Jobs run on cron-style schedules ("minute hour day-of-month month day-of-week",
+server local time) inside the API's event loop; the work itself runs in a
+thread so requests keep being served. Every API worker runs its own
+scheduler, so each run first takes a lease for that job and scheduled time:
+whichever worker gets it runs the job and the others skip that occurrence.
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """Five-field cron expression supporting *, lists, ranges and steps"""
+
+    BOUNDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.BOUNDS)
+        ]
+        # Like cron, restricting both day fields matches either of them
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            part, _, step = part.partition("/")
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-", 1))
+            else:
+                start = end = int(part)
+                if step:
+                    end = high
+            # Day of week also accepts 7 for Sunday
+            top = 7 if high == 6 else high
+            if start < low or end > top or start > end:
+                raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+            values.update(value % 7 if high == 6 else value for value in range(start, end + 1, int(step or 1)))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=28) + timedelta(days=4)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+
+class Job:
+    """A named callable, its schedule and its run statistics"""
+
+    def __init__(self, name: str, schedule: CronSchedule, func: Callable[[], object]):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.next_run: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_result: object = None
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "schedule": self.schedule.expression,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_duration_seconds": self.last_duration,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Run jobs on their schedules, one worker per occurrence.
+
+    ``acquire(name, owner, slot, lease_seconds) -> bool`` and
+    ``release(name, owner)`` implement the cross-worker lease; without them
+    every worker runs every job.
+    """
+
+    def __init__(self, acquire: Optional[Callable[[str, str, datetime, int], bool]] = None,
+                 release: Optional[Callable[[str, str], None]] = None,
+                 lease_seconds: int = 3600):
+        self.acquire = acquire
+        self.release = release
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, Job] = {}
+        self._task: Optional[asyncio.Task] = None
+        # The loop only keeps weak references to tasks
+        self._job_tasks: Set[asyncio.Task] = set()
+
+    def add_job(self, name: str, schedule: str, func: Callable[[], object]):
+        """Register a job; raises ValueError if its schedule is invalid or never fires"""
+        cron = CronSchedule(schedule)
+        # Expressions like "0 3 30 2 *" parse but never match; reject them here
+        # rather than in _run_forever, where the error would stop every job
+        cron.next_after(datetime.now())
+        self.jobs[name] = Job(name, cron, func)
+
+    def start(self):
+        if self.jobs and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_forever())
+            logger.info(f"Scheduler started with jobs: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self):
+        now = datetime.now()
+        for job in self.jobs.values():
+            job.next_run = job.schedule.next_after(now)
+
+        while True:
+            due = min(job.next_run for job in self.jobs.values())
+            # Sleep in short steps so clock jumps and suspends are noticed
+            delay = (due - datetime.now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, 60))
+                continue
+
+            for job in self.jobs.values():
+                if job.next_run <= datetime.now():
+                    slot = job.next_run
+                    job.next_run = job.schedule.next_after(max(slot, datetime.now() - timedelta(minutes=1)))
+                    task = asyncio.get_running_loop().create_task(self.run_job(job.name, slot))
+                    self._job_tasks.add(task)
+                    task.add_done_callback(self._job_tasks.discard)
+
+    async def run_job(self, name: str, slot: Optional[datetime] = None) -> Optional[str]:
+        """Run a job now (or for a scheduled slot) unless another run or worker has it"""
+        job = self.jobs[name]
+        slot = slot or datetime.now().replace(second=0, microsecond=0)
+
+        if job.running:
+            job.skipped += 1
+            return "skipped"
+        job.running = True
+        try:
+            if self.acquire is not None:
+                acquired = await asyncio.to_thread(self.acquire, name, self.owner, slot, self.lease_seconds)
+                if not acquired:
+                    job.skipped += 1
+                    return "skipped"
+
+            job.last_started = time.time()
+            started = time.perf_counter()
+            try:
+                job.last_result = await asyncio.to_thread(job.func)
+                job.last_status = "ok"
+                job.last_error = None
+            except Exception as e:
+                logger.error(f"Scheduled job {name} failed: {e}")
+                job.failures += 1
+                job.last_status = "error"
+                job.last_error = str(e)
+            finally:
+                job.runs += 1
+                job.last_duration = round(time.perf_counter() - started, 3)
+                job.last_finished = time.time()
+                if self.release is not None:
+                    try:
+                        await asyncio.to_thread(self.release, name, self.owner)
+                    except Exception as e:
+                        logger.error(f"Failed to release lease for job {name}: {e}")
+            return job.last_status
+        finally:
+            job.running = False
+
+    def stats(self) -> List[Dict]:
+        return [job.stats() for job in self.jobs.values()]
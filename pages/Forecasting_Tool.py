@@ -25,6 +25,18 @@ from utils.api_client import (
     show_backend_status, 
     check_authentication
 )
+from utils.data_access import (
+    load_demand_data,
+    load_demand_data_progressively,
+    load_dimensions,
+    load_forecast_accuracy,
+    load_precomputed_forecasts,
+    resolve_filter_ids,
+    day_range,
+    ALL_DISHES,
+    ALL_OUTLETS,
+    FORECAST_HORIZONS
+)
 from utils.translations import t, create_language_selector
 
 # Suppress warnings for cleaner output
@@ -313,35 +325,18 @@ st.markdown("""
 # Weather and event options
 WEATHER_OPTIONS = ["Sunny", "Rainy", "Cloudy", "Stormy"]
 EVENT_OPTIONS = ["None", "Festival", "Holiday", "Special Event", "Promotion"]
+# Share of a streamed load between redraws of the loading preview
+PREVIEW_REDRAW_STEP = 0.25
 
-@st.cache_data
-def load_forecasting_data():
-    """Load historical data from backend API"""
-    try:
-        client = get_api_client()
-        if client.health_check():
-            df = client.get_demand_data()
-            if not df.empty:
-                # Ensure required columns exist and are properly formatted
-                required_cols = ['date', 'dish', 'outlet', 'predicted_demand']
-                for col in required_cols:
-                    if col not in df.columns:
-                        if col == 'dish' and 'dish_name' in df.columns:
-                            df['dish'] = df['dish_name']
-                        elif col == 'outlet' and 'outlet_name' in df.columns:
-                            df['outlet'] = df['outlet_name']
-                
-                if 'date' in df.columns:
-                    df['date'] = pd.to_datetime(df['date'])
-                
-                return df
-            else:
-                return pd.DataFrame()
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"❌ **Data loading error**: {str(e)}")
-        return pd.DataFrame()
+def format_accuracy(accuracy):
+    """One-line accuracy summary, empty when there are no actuals yet"""
+    overall = accuracy['overall'] if accuracy else None
+    if not overall or overall['wape'] is None:
+        return ""
+    return (
+        f"{t('measured_accuracy')}: MAPE {overall['mape']:.1f}% · WAPE {overall['wape']:.1f}% · "
+        f"Bias {overall['bias_pct']:+.1f}% · RMSE {overall['rmse']:.1f}"
+    )
 
 def create_metrics_cards(data, selected_dish, selected_outlet):
     """Create enhanced metrics cards with improved design"""
@@ -351,9 +346,9 @@ def create_metrics_cards(data, selected_dish, selected_outlet):
     
     # Filter data based on selections
     filtered_data = data.copy()
-    if selected_dish != "All Dishes":
+    if selected_dish != ALL_DISHES:
         filtered_data = filtered_data[filtered_data['dish'] == selected_dish]
-    if selected_outlet != "All Outlets":
+    if selected_outlet != ALL_OUTLETS:
         filtered_data = filtered_data[filtered_data['outlet'] == selected_outlet]
     
     if filtered_data.empty:
@@ -399,9 +394,9 @@ def create_forecast_visualization(historical_data, forecast_data, selected_dish,
     
     # Filter historical data
     filtered_historical = historical_data.copy()
-    if selected_dish != "All Dishes":
+    if selected_dish != ALL_DISHES:
         filtered_historical = filtered_historical[filtered_historical['dish'] == selected_dish]
-    if selected_outlet != "All Outlets":
+    if selected_outlet != ALL_OUTLETS:
         filtered_historical = filtered_historical[filtered_historical['outlet'] == selected_outlet]
     
     if filtered_historical.empty:
@@ -474,14 +469,14 @@ def create_demand_breakdown(data, selected_outlet):
     
     # Filter by outlet if specified
     filtered_data = data.copy()
-    if selected_outlet != "All Outlets":
+    if selected_outlet != ALL_OUTLETS:
         filtered_data = filtered_data[filtered_data['outlet'] == selected_outlet]
     
     if filtered_data.empty:
         return None
     
     # Aggregate by dish
-    dish_demand = filtered_data.groupby('dish')['predicted_demand'].sum().reset_index()
+    dish_demand = filtered_data.groupby('dish', observed=True)['predicted_demand'].sum().reset_index()
     dish_demand = dish_demand.sort_values('predicted_demand', ascending=True)
     
     # Create horizontal bar chart
@@ -544,11 +539,10 @@ def main():
     
     st.markdown("---")
     
-    # Load data from backend
-    with st.spinner("🔄 Loading historical data from backend..."):
-        historical_data = load_forecasting_data()
+    # Selections come from the cached outlet and dish lists, so data is only fetched for the chosen slice
+    dimensions = load_dimensions()
     
-    if historical_data.empty:
+    if not dimensions["outlets"] or not dimensions["dishes"]:
         st.error("❌ **No historical data available for forecasting**")
         st.info("""
         **To use the forecasting tool:**
@@ -566,9 +560,8 @@ def main():
                 st.switch_page("Home.py")
         return
     
-    # Get available dishes and outlets from the data
-    available_dishes = ["All Dishes"] + sorted(historical_data['dish'].unique().tolist())
-    available_outlets = ["All Outlets"] + sorted(historical_data['outlet'].unique().tolist())
+    available_dishes = [ALL_DISHES] + sorted(dimensions["dishes"])
+    available_outlets = [ALL_OUTLETS] + sorted(dimensions["outlets"])
     
     # Enhanced control panel
     st.markdown(f"""
@@ -598,7 +591,7 @@ def main():
     with control_col3:
         forecast_horizon = st.selectbox(
             f"📅 {t('forecast_horizon')}",
-            [7, 14, 30],
+            FORECAST_HORIZONS,
             index=0,
             format_func=lambda x: f"{x} {t('days')}",
             help="Select the number of days to forecast"
@@ -606,13 +599,51 @@ def main():
     
     st.markdown("---")
     
-    # Generate forecast data using the utility function
-    with st.spinner("🤖 Generating AI forecasts from backend data..."):
-        try:
-            forecast_data = create_forecast_data(historical_data, forecast_horizon)
-        except Exception as e:
-            st.error(f"❌ **Forecast Generation Error**: {str(e)}")
-            forecast_data = pd.DataFrame()
+    # The backend filters by outlet and dish; the breakdown needs every dish at the outlet
+    outlet_id, dish_id = resolve_filter_ids(dimensions, selected_outlet, selected_dish)
+    # A first load streams newest rows first; preview them while older history arrives.
+    # Each chunk is reduced to per-date totals once, and the chart is redrawn
+    # only a few times, so the preview costs little next to the download.
+    progress_placeholder = st.empty()
+    preview_placeholder = st.empty()
+    preview_totals = []
+    preview_state = {"next_redraw": PREVIEW_REDRAW_STEP}
+
+    def show_loading_preview(chunk, loaded, total):
+        progress = min(loaded / total, 1.0) if total else 1.0
+        progress_placeholder.progress(
+            progress,
+            text=f"🔄 Loading historical data from backend... {loaded:,} of {total:,} rows"
+        )
+        if selected_dish != ALL_DISHES:
+            chunk = chunk[chunk['dish'] == selected_dish]
+        if selected_outlet != ALL_OUTLETS:
+            chunk = chunk[chunk['outlet'] == selected_outlet]
+        preview_totals.append(chunk.groupby('date')['predicted_demand'].sum())
+        
+        if progress < preview_state["next_redraw"] or progress >= 1.0:
+            return
+        preview_state["next_redraw"] = progress + PREVIEW_REDRAW_STEP
+        totals = pd.concat(preview_totals).groupby(level=0).sum().reset_index()
+        preview_fig = create_forecast_visualization(totals, pd.DataFrame(), ALL_DISHES, ALL_OUTLETS)
+        if preview_fig:
+            preview_placeholder.plotly_chart(preview_fig, use_container_width=True)
+
+    with st.spinner("🔄 Loading historical data from backend..."):
+        outlet_data = load_demand_data_progressively(show_loading_preview, outlet_id=outlet_id)
+        historical_data = load_demand_data(outlet_id=outlet_id, dish_id=dish_id) if dish_id else outlet_data
+    progress_placeholder.empty()
+    preview_placeholder.empty()
+    
+    # Prefer the backend's latest forecast run; generate locally only if there is none
+    forecast_data = load_precomputed_forecasts(forecast_horizon)
+    if forecast_data.empty:
+        with st.spinner("🤖 Generating AI forecasts from backend data..."):
+            try:
+                forecast_data = create_forecast_data(load_demand_data(), forecast_horizon)
+            except Exception as e:
+                st.error(f"❌ **Forecast Generation Error**: {str(e)}")
+                forecast_data = pd.DataFrame()
     
     # Enhanced metrics dashboard
     st.markdown(f"### 📊 {t('performance_metrics')}")
@@ -640,7 +671,7 @@ def main():
     
     with col1:
         st.markdown(f"### 📈 {t('demand_breakdown')}")
-        breakdown_fig = create_demand_breakdown(historical_data, selected_outlet)
+        breakdown_fig = create_demand_breakdown(outlet_data, selected_outlet)
         if breakdown_fig:
             st.plotly_chart(breakdown_fig, use_container_width=True)
         else:
@@ -649,12 +680,15 @@ def main():
     with col2:
         st.markdown(f"### 🎯 {t('ai_insights_analysis')}")
         
+        accuracy_summary = format_accuracy(load_forecast_accuracy())
+        
         # Enhanced insights section
         st.markdown(f"""
         <div class="insights-section">
             <div class="insight-item">
                 <h4 style="color: #FF6B35; margin-bottom: 0.5rem;">🔮 {t('forecast_confidence')}</h4>
                 <p>{t('confidence_desc')}</p>
+                <p>{accuracy_summary}</p>
             </div>
             
             <div class="insight-item">
@@ -687,18 +721,17 @@ def main():
     export_col1, export_col2, export_col3 = st.columns(3)
     
     with export_col1:
-        if st.button(f"📊 {t('export_data')}", use_container_width=True):
-            if not historical_data.empty:
-                csv_data = historical_data.to_csv(index=False)
-                st.download_button(
-                    label=f"⬇️ {t('download_csv')}",
-                    data=csv_data,
-                    file_name=f"KKCG_Forecast_Data_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            else:
-                st.warning(f"⚠️ {t('no_data_available')} to export")
+        # Streamed by the backend so large exports never pass through this process;
+        # the file holds the selected outlet and dish over the days shown
+        export_range = {}
+        if not historical_data.empty:
+            export_start, export_end = day_range(historical_data['date'].min(), historical_data['date'].max())
+            export_range = {"start_date": export_start, "end_date": export_end}
+        st.link_button(
+            f"⬇️ {t('download_csv')}",
+            get_api_client().get_export_url("csv", outlet_id=outlet_id, dish_id=dish_id, **export_range),
+            use_container_width=True
+        )
     
     with export_col2:
         if st.button(f"📈 {t('generate_report')}", use_container_width=True):
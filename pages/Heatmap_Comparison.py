@@ -11,12 +11,22 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 # Import utilities
-from utils.heatmap_utils import create_demand_heatmap, generate_ai_insights, get_performance_metrics
+from utils.heatmap_utils import create_demand_heatmap, generate_ai_insights, get_performance_metrics, choose_time_bucket
 from utils.api_client import (
     get_api_client, 
     show_backend_status, 
     check_authentication
 )
+from utils.data_access import (
+    load_date_bounds,
+    load_heatmap_matrix,
+    load_peak_demand,
+    load_top_rankings,
+    load_trend_series,
+    day_range,
+    DEFAULT_HEATMAP_AGG,
+    DEFAULT_HEATMAP_METRIC
+)
 from utils.translations import t, create_language_selector
 
 # Page configuration
@@ -334,55 +344,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_heatmap_data():
-    """Load data for heatmap analysis from backend API"""
-    try:
-        client = get_api_client()
-        if client.health_check():
-            df = client.get_demand_data()
-            if not df.empty:
-                # Ensure required columns exist and are properly formatted
-                required_cols = ['date', 'dish', 'outlet', 'predicted_demand']
-                for col in required_cols:
-                    if col not in df.columns:
-                        if col == 'dish' and 'dish_name' in df.columns:
-                            df['dish'] = df['dish_name']
-                        elif col == 'outlet' and 'outlet_name' in df.columns:
-                            df['outlet'] = df['outlet_name']
-                
-                if 'date' in df.columns:
-                    df['date'] = pd.to_datetime(df['date'])
-                
-                return df
-            else:
-                return pd.DataFrame()
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"❌ **Heatmap data error**: {str(e)}")
-        return pd.DataFrame()
-
-def create_interactive_heatmap(df, metric='predicted_demand', title="Demand Heatmap"):
+def create_interactive_heatmap(pivot_data, metric='predicted_demand', title="Demand Heatmap"):
     """Create an enhanced interactive heatmap visualization"""
     
-    if df.empty:
-        st.info("🔥 **No heatmap data available** - Data needed for visualization")
-        return None
-    
-    # Create pivot table for heatmap
-    if 'dish' in df.columns and 'outlet' in df.columns:
-        pivot_data = df.pivot_table(
-            values=metric, 
-            index='dish', 
-            columns='outlet', 
-            aggfunc='mean',
-            fill_value=0
-        )
-    else:
-        st.error("❌ **Missing columns**: Backend data must contain 'dish' and 'outlet' columns")
-        return None
-    
     if pivot_data.empty:
         st.warning(f"⚠️ **No pivot data**: Unable to create heatmap from current data selection")
         return None
@@ -427,25 +391,19 @@ def create_interactive_heatmap(df, metric='predicted_demand', title="Demand Heat
     
     return fig
 
-def create_comparison_metrics(df):
+def create_comparison_metrics(start_date, end_date):
     """Create performance comparison metrics"""
-    if df.empty:
-        return pd.DataFrame(), pd.DataFrame()
-    
-    # Outlet performance
-    outlet_performance = df.groupby('outlet').agg({
-        'predicted_demand': ['sum', 'mean', 'count']
-    }).round(2)
-    outlet_performance.columns = ['Total_Demand', 'Avg_Demand', 'Records']
-    outlet_performance = outlet_performance.reset_index().sort_values('Total_Demand', ascending=False)
-    
-    # Dish performance
-    dish_performance = df.groupby('dish').agg({
-        'predicted_demand': ['sum', 'mean', 'count']
-    }).round(2)
-    dish_performance.columns = ['Total_Demand', 'Avg_Demand', 'Records']
-    dish_performance = dish_performance.reset_index().sort_values('Total_Demand', ascending=False)
-    
+    rankings = load_top_rankings(5, start_date, end_date)
+    frames = []
+    for item in ('outlet', 'dish'):
+        groups = rankings[item]
+        ranked = groups[0]['items'] if groups else []
+        frames.append(pd.DataFrame(
+            [{item: entry['name'], 'Total_Demand': entry['value']} for entry in ranked],
+            columns=[item, 'Total_Demand']
+        ))
+    
+    outlet_performance, dish_performance = frames
     return outlet_performance, dish_performance
 
 def create_performance_dashboard(outlet_perf, dish_perf):
@@ -494,23 +452,19 @@ def create_performance_dashboard(outlet_perf, dish_perf):
                 </div>
                 """, unsafe_allow_html=True)
 
-def create_trend_analysis(df):
+def create_trend_analysis(trend_series, bucket='day'):
     """Create enhanced trend analysis visualization"""
-    if df.empty or 'date' not in df.columns:
+    if trend_series.empty or 'date' not in trend_series.columns:
         return None
     
-    # Daily trend
-    daily_trend = df.groupby('date')['predicted_demand'].sum().reset_index()
-    
-    if daily_trend.empty:
-        return None
+    bucket_titles = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}
     
     # Create trend chart
     fig = px.line(
-        daily_trend,
+        trend_series,
         x='date',
         y='predicted_demand',
-        title='Daily Demand Trends',
+        title=f"{bucket_titles[bucket]} Demand Trends",
         markers=True
     )
     
@@ -532,16 +486,17 @@ def create_trend_analysis(df):
     
     return fig
 
-def create_ai_recommendations(df):
+def create_ai_recommendations(start_date, end_date):
     """Create AI-powered recommendations section"""
-    if df.empty:
+    # Same request as the comparison metrics, so this is served from cache
+    rankings = load_top_rankings(5, start_date, end_date)
+    top_dish_groups, top_outlet_groups = rankings['dish'], rankings['outlet']
+    if not (top_dish_groups and top_dish_groups[0]['items'] and top_outlet_groups and top_outlet_groups[0]['items']):
         st.info("🤖 **AI recommendations will appear when data is available**")
         return
     
-    # Calculate some insights
-    total_demand = df['predicted_demand'].sum()
-    top_dish = df.groupby('dish')['predicted_demand'].sum().idxmax()
-    top_outlet = df.groupby('outlet')['predicted_demand'].sum().idxmax()
+    top_dish = top_dish_groups[0]['items'][0]['name']
+    top_outlet = top_outlet_groups[0]['items'][0]['name']
     
     recommendations = [
         {
@@ -619,11 +574,10 @@ def main():
     
     st.markdown("---")
     
-    # Load data from backend
-    with st.spinner(f"🔄 {t('loading_data')}"):
-        df = load_heatmap_data()
+    # Bound the date picker from the backend summary; everything below is aggregated by the backend
+    first_date, last_date = load_date_bounds()
     
-    if df.empty:
+    if first_date is None:
         st.error(f"❌ **{t('no_data_available')} for heatmap analysis**")
         st.info("""
         **To use the heatmap analytics:**
@@ -652,28 +606,28 @@ def main():
     
     with filter_col1:
         # Date range filter
-        if 'date' in df.columns:
-            min_date = df['date'].min()
-            max_date = df['date'].max()
-            date_range = st.date_input(
-                f"📅 {t('date_range')}",
-                value=(min_date, max_date),
-                min_value=min_date,
-                max_value=max_date,
-                help="Select the date range for analysis"
-            )
-            
-            # Filter dataframe by date
-            if len(date_range) == 2:
-                start_date, end_date = date_range
-                df = df[(df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))]
-        else:
-            st.info(f"📅 No date filtering available - backend data missing date column")
+        date_range = st.date_input(
+            f"📅 {t('date_range')}",
+            value=(first_date, last_date),
+            min_value=first_date,
+            max_value=last_date,
+            help="Select the date range for analysis"
+        )
+    
+    # Backend aggregates cover whole days of the selected range
+    start_date, end_date = date_range if len(date_range) == 2 else (first_date, last_date)
+    range_start, range_end = day_range(start_date, end_date)
+    
+    # Daily totals and row counts; the overview, insights and trend bounds come from these
+    with st.spinner(f"🔄 {t('loading_data')}"):
+        daily = load_trend_series('day', range_start, range_end)
+    if not daily.empty:
+        daily = daily[daily['records'] > 0]
     
     with filter_col2:
         # Metric selection
-        available_metrics = ['predicted_demand']
-        if 'actual_demand' in df.columns:
+        available_metrics = [DEFAULT_HEATMAP_METRIC]
+        if not daily.empty and daily['actual_demand'].notna().any():
             available_metrics.append('actual_demand')
         
         selected_metric = st.selectbox(
@@ -687,7 +641,7 @@ def main():
         # Aggregation method
         agg_method = st.selectbox(
             f"🔢 {t('aggregation_method')}",
-            ['mean', 'sum', 'max'],
+            [DEFAULT_HEATMAP_AGG, 'sum', 'max'],
             format_func=lambda x: x.title(),
             help="Select how to aggregate the data"
         )
@@ -695,29 +649,33 @@ def main():
     st.markdown("---")
     
     # Show filtered data info
-    if df.empty:
+    if daily.empty:
         st.warning("⚠️ **No data available** for selected filters - please adjust date range or check data")
         return
     
+    total_records = int(daily['records'].sum())
+    total_demand = daily['predicted_demand'].sum()
+    heatmap_matrix = load_heatmap_matrix(selected_metric, agg_method, range_start, range_end)
+    
     # Data overview
     st.markdown(f"""
     <div class="stats-highlight">
         <h3>📊 {t('live_data_overview')}</h3>
         <div class="stats-grid">
             <div class="stat-item">
-                <div class="stat-value">{len(df):,}</div>
+                <div class="stat-value">{total_records:,}</div>
                 <div class="stat-label">{t('total_records')}</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{df['dish'].nunique()}</div>
+                <div class="stat-value">{len(heatmap_matrix.index)}</div>
                 <div class="stat-label">{t('unique_dishes')}</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{df['outlet'].nunique()}</div>
+                <div class="stat-value">{len(heatmap_matrix.columns)}</div>
                 <div class="stat-label">{t('active_outlets')}</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{df['predicted_demand'].sum():,.0f}</div>
+                <div class="stat-value">{total_demand:,.0f}</div>
                 <div class="stat-label">{t('total_demand')}</div>
             </div>
         </div>
@@ -728,7 +686,7 @@ def main():
     st.markdown(f"### 🔥 {t('interactive_demand_heatmap')}")
     
     heatmap_fig = create_interactive_heatmap(
-        df, 
+        heatmap_matrix, 
         metric=selected_metric, 
         title=f"Demand Heatmap ({agg_method.title()})"
     )
@@ -743,7 +701,7 @@ def main():
     # Performance metrics and rankings
     st.markdown("### 📊 Performance Analysis")
     
-    outlet_perf, dish_perf = create_comparison_metrics(df)
+    outlet_perf, dish_perf = create_comparison_metrics(range_start, range_end)
     create_performance_dashboard(outlet_perf, dish_perf)
     
     st.markdown("---")
@@ -753,7 +711,9 @@ def main():
     
     with col1:
         st.markdown("### 📈 Trend Analysis")
-        trend_fig = create_trend_analysis(df)
+        trend_bucket = choose_time_bucket(range_start, range_end)
+        trend_series = load_trend_series(trend_bucket, range_start, range_end)
+        trend_fig = create_trend_analysis(trend_series, trend_bucket)
         if trend_fig:
             st.plotly_chart(trend_fig, use_container_width=True)
         else:
@@ -762,11 +722,11 @@ def main():
     with col2:
         st.markdown("### 🎯 Key Insights")
         
-        if not df.empty:
-            total_demand = df['predicted_demand'].sum()
-            avg_demand = df['predicted_demand'].mean()
-            peak_demand = df['predicted_demand'].max()
-            date_span = df['date'].max() - df['date'].min() if 'date' in df.columns else timedelta(days=0)
+        if total_records:
+            avg_demand = total_demand / total_records
+            peak_demand = load_peak_demand(range_start, range_end) or 0
+            # Days with data, first and last included
+            date_span = daily['date'].max() - daily['date'].min() + timedelta(days=1)
             
             # Enhanced insights cards
             insights = [
@@ -810,7 +770,7 @@ def main():
     st.markdown("---")
     
     # AI-powered recommendations
-    create_ai_recommendations(df)
+    create_ai_recommendations(range_start, range_end)
     
     # Action buttons
     st.markdown("### ⚡ Quick Actions")
@@ -818,22 +778,16 @@ def main():
     action_col1, action_col2, action_col3 = st.columns(3)
     
     with action_col1:
-        if st.button("📊 Export Heatmap Data", use_container_width=True):
-            if not df.empty:
-                csv_data = df.to_csv(index=False)
-                st.download_button(
-                    label="⬇️ Download CSV",
-                    data=csv_data,
-                    file_name=f"KKCG_Heatmap_Data_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            else:
-                st.warning("⚠️ No data to export")
+        # Streamed by the backend so large exports never pass through this process
+        st.link_button(
+            "⬇️ Download CSV",
+            get_api_client().get_export_url("csv", start_date=range_start, end_date=range_end),
+            use_container_width=True
+        )
     
     with action_col2:
         if st.button("📈 Generate Analytics Report", use_container_width=True):
-            if not df.empty:
+            if total_records:
                 st.success("📄 Analytics report generated successfully!")
             else:
                 st.warning("⚠️ No data for report generation")
@@ -180,7 +180,7 @@ def main():
     
     with col2:
         if st.button(f"🔄 {t('test_connection')}", help="Test backend connectivity", use_container_width=True):
-            if client.health_check():
+            if client.health_check(force=True):
                 st.success(f"✅ {t('connection_verified')}!")
             else:
                 st.error(f"❌ {t('connection_failed')}!")
@@ -292,6 +292,44 @@ def main():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # Client Performance Section
+    st.markdown('<div class="settings-section">', unsafe_allow_html=True)
+    st.markdown(f"### ⏱️ {t('client_performance')}")
+    
+    timings = client.metrics.endpoint_summary()
+    cache_rates = client.cache_hit_rates()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Recorded Calls", int(timings["calls"].sum()) if not timings.empty else 0,
+                  help=f"The last {client.METRICS_CAPACITY} API client calls from all sessions")
+    with col2:
+        st.metric("p95 Latency", f"{timings['p95_ms'].max():,.0f} ms" if not timings.empty else "n/a",
+                  help="Slowest endpoint's 95th percentile wall time")
+    with col3:
+        st.metric("Demand Data in Memory", f"{client.demand_memory_usage() / 1024 ** 2:,.2f} MB",
+                  help="DataFrames the client keeps to sync only changes")
+    
+    if timings.empty:
+        st.info("📊 No API calls recorded yet")
+    else:
+        st.dataframe(
+            timings.rename(columns={
+                "calls": "Calls", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+                "decode_p50_ms": "Decode p50 (ms)", "avg_kb": "Avg Size (KB)", "errors": "Errors"
+            }),
+            use_container_width=True
+        )
+    
+    cache_rates["hit_rate"] = (cache_rates["hit_rate"] * 100).round(0)
+    st.dataframe(
+        cache_rates.rename(columns={"cache": "Cache", "hits": "Hits", "misses": "Misses", "hit_rate": "Hit Rate (%)"}),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
     # System Information Section
     st.markdown('<div class="settings-section">', unsafe_allow_html=True)
     st.markdown(f"### 📊 {t('system_information')}")
@@ -0,0 +1,18 @@
+"""
+Run the backend and client against throwaway storage.
+
+DATABASE_URL and KKCG_CACHE_DIR are read when main and utils.api_client are
+imported, so they are set here, before any test module imports either.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+_tmp = tempfile.mkdtemp(prefix="kkcg-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'kkcg_analytics.db')}"
+os.environ["KKCG_CACHE_DIR"] = os.path.join(_tmp, "client-cache")
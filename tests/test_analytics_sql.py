@@ -0,0 +1,26 @@
+"""
+Analytics queries compiled for PostgreSQL, which the SQLite test database
+would not catch.
+"""
+
+import re
+
+from sqlalchemy.dialects import postgresql
+
+import main
+
+
+def postgres_sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_unpartitioned_top_items_group_by_item_only():
+    sql = postgres_sql(main.top_items_select(None, "dish", "sum(predicted_demand)", 5, "desc", None, None))
+    # PostgreSQL reads an integer in GROUP BY as a column position
+    assert re.findall(r"GROUP BY ([^\n]*)", sql) == ["demand_data.dish_id "]
+    assert "0 AS partition_id" in sql
+
+
+def test_partitioned_top_items_group_by_partition_and_item():
+    sql = postgres_sql(main.top_items_select("outlet", "dish", "max(actual_demand)", 3, "asc", None, None))
+    assert re.findall(r"GROUP BY ([^\n]*)", sql) == ["demand_data.outlet_id, demand_data.dish_id "]
@@ -0,0 +1,32 @@
+"""
+Demand frames decoded by the API client.
+"""
+
+from utils.api_client import KKCGAPIClient, _ColumnBuffer
+
+
+def test_streamed_and_fetched_frames_share_dtypes():
+    chunks = [
+        # Streams come newest first, and the newest rows often have no actuals yet
+        {"id": [4, 3], "date": ["2024-01-04T00:00:00", "2024-01-03T00:00:00.5"],
+         "actual_demand": [None, None], "predicted_demand": [7, 6]},
+        {"id": [2, 1], "date": ["2024-01-02T00:00:00", "2024-01-01T00:00:00"],
+         "actual_demand": [5, None], "predicted_demand": [4, 3]},
+    ]
+    buffer = _ColumnBuffer(4)
+    for chunk in chunks:
+        buffer.append(chunk)
+    streamed = KKCGAPIClient._demand_frame({"format": "compact", "columns": buffer.view(),
+                                            "outlets": {}, "dishes": {}})
+
+    merged = {name: chunks[0][name] + chunks[1][name] for name in chunks[0]}
+    fetched = KKCGAPIClient._demand_frame({"format": "compact", "columns": merged,
+                                           "outlets": {}, "dishes": {}})
+
+    assert streamed.dtypes.to_dict() == fetched.dtypes.to_dict()
+    assert streamed['actual_demand'].dtype == "float64"
+
+
+def test_fetched_frame_without_actuals_is_numeric():
+    df = KKCGAPIClient._demand_frame([{"id": 1, "date": "2024-01-01", "actual_demand": None, "predicted_demand": 3}])
+    assert df['actual_demand'].dtype == "float64"
@@ -0,0 +1,139 @@
+"""
+Import a CSV into a throwaway backend and read it back through the API client.
+
+Imported rows are stored at midnight and serialize without fractional
+seconds, while seeded rows carry microseconds; the client has to parse both.
+"""
+
+import socket
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def backend_url():
+    import uvicorn
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            pytest.fail("backend did not start")
+        time.sleep(0.05)
+
+    url = f"http://127.0.0.1:{port}"
+    requests.post(f"{url}/seed-data", timeout=60).raise_for_status()
+    yield url
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def test_imported_rows_read_back_through_client(backend_url):
+    outlet = requests.get(f"{backend_url}/outlets", timeout=10).json()[0]["name"]
+    dish = requests.get(f"{backend_url}/dishes", timeout=10).json()[0]["name"]
+    csv_body = "outlet,dish,date,actual,predicted\n" + "".join(
+        f"{outlet},{dish},2024-01-0{day}T00:00:00,{100 + day},{110 + day}\n" for day in range(1, 4)
+    )
+    result = requests.post(f"{backend_url}/import/demand", data=csv_body.encode(), timeout=30).json()
+    assert result["rows_imported"] == 3
+
+    from utils.api_client import KKCGAPIClient
+
+    df = KKCGAPIClient(backend_url).get_demand_data()
+    imported = df[df['date'] < "2024-02-01"]
+    assert len(imported) == 3
+    assert list(imported.sort_values('date')['predicted_demand']) == [111, 112, 113]
+
+    chunks = [chunk for chunk, _, _ in KKCGAPIClient(backend_url).iter_demand_data(chunk_rows=100)]
+    assert chunks, "stream yielded no chunks"
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert len(streamed) == len(df)
+    assert (streamed['date'] < "2024-02-01").sum() == 3
+
+
+def test_reimport_rejects_duplicates(backend_url):
+    outlet = requests.get(f"{backend_url}/outlets", timeout=10).json()[0]["name"]
+    dish = requests.get(f"{backend_url}/dishes", timeout=10).json()[0]["name"]
+    csv_body = "outlet,dish,date,actual,predicted\n" + "".join(
+        f"{outlet},{dish},2023-06-0{day}T00:00:00,{day},{day}\n" for day in (1, 2, 2)
+    )
+    first = requests.post(f"{backend_url}/import/demand", data=csv_body.encode(), timeout=30).json()
+    assert first["rows_imported"] == 2
+    assert first["rejected"] == [{"line": 4, "reason": "Duplicate of line 3"}]
+
+    again = requests.post(f"{backend_url}/import/demand", data=csv_body.encode(), timeout=30).json()
+    assert again["rows_imported"] == 0
+    assert again["rows_rejected"] == 3
+    assert all(reject["reason"].startswith("Duplicate") for reject in again["rejected"])
+
+    rows = requests.get(f"{backend_url}/demand-data", params={
+        "start_date": "2023-06-01T00:00:00", "end_date": "2023-06-30T00:00:00"
+    }, timeout=10).json()
+    assert len(rows) == 2
+
+
+def test_import_during_fetch_reaches_client(backend_url, monkeypatch):
+    import io
+    import main
+    from utils.api_client import KKCGAPIClient
+
+    outlet = requests.get(f"{backend_url}/outlets", timeout=10).json()[0]
+    dish = requests.get(f"{backend_url}/dishes", timeout=10).json()[-1]
+    build_payload = main.compact_demand_payload
+
+    def payload_then_import(*args, **kwargs):
+        # The rows are read, then an import commits before the response is sent
+        payload = build_payload(*args, **kwargs)
+        monkeypatch.setattr(main, "compact_demand_payload", build_payload)
+        csv_body = f"outlet,dish,date,actual,predicted\n{outlet['name']},{dish['name']},2022-03-01T00:00:00,,7\n"
+        main.import_demand_file(io.BytesIO(csv_body.encode()))
+        return payload
+
+    monkeypatch.setattr(main, "compact_demand_payload", payload_then_import)
+    client = KKCGAPIClient(backend_url)
+    first = client.get_demand_data(dish_id=dish["id"])
+    assert (first['date'] < "2023-01-01").sum() == 0
+
+    again = client.get_demand_data(dish_id=dish["id"])
+    assert (again['date'] < "2023-01-01").sum() == 1
+
+
+def test_failed_demand_query_is_an_error(backend_url, monkeypatch):
+    import main
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(main, "build_demand_query", fail)
+    main.invalidate_demand_caches()
+    for format in ("rows", "compact"):
+        response = requests.get(f"{backend_url}/demand-data", params={"format": format}, timeout=10)
+        assert response.status_code == 500
+
+
+def test_failed_fetch_off_script_thread_raises(backend_url, monkeypatch):
+    import main
+    from utils.api_client import BackgroundFetchError, KKCGAPIClient
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(main, "build_demand_query", fail)
+    main.invalidate_demand_caches()
+    # As on the prefetch thread: no page to show the error, so nothing to return
+    with pytest.raises(BackgroundFetchError):
+        KKCGAPIClient(backend_url).get_demand_data(dish_id=1)
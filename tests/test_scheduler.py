@@ -0,0 +1,15 @@
+"""
+Cron schedules accepted by the backend scheduler.
+"""
+
+import pytest
+
+from scheduler import Scheduler
+
+
+def test_schedule_that_never_fires_is_rejected():
+    scheduler = Scheduler()
+    scheduler.add_job("nightly", "0 3 * * *", lambda: None)
+    with pytest.raises(ValueError):
+        scheduler.add_job("feb_30", "0 3 30 2 *", lambda: None)
+    assert list(scheduler.jobs) == ["nightly"]
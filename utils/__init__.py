@@ -2,7 +2,7 @@
 # This package contains utility modules for the KKCG multipage Streamlit app
 
 from .data_simulation import generate_demand_data, SOUTH_INDIAN_DISHES, OUTLETS
-from .heatmap_utils import create_demand_heatmap, generate_trend_chart, generate_comparison_bar_chart, generate_ai_insights, get_performance_metrics
+from .heatmap_utils import create_demand_heatmap, generate_trend_chart, generate_comparison_bar_chart, generate_ai_insights, get_performance_metrics, choose_time_bucket
 from .insights import compute_business_insights, generate_insight_texts, generate_recommendations
 
 __all__ = [
@@ -14,6 +14,7 @@ __all__ = [
     'generate_comparison_bar_chart',
     'generate_ai_insights',
     'get_performance_metrics',
+    'choose_time_bucket',
     'compute_business_insights',
     'generate_insight_texts',
     'generate_recommendations'
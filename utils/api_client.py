@@ -1,14 +1,99 @@
 # KKCG Analytics API Client
 import requests
 import streamlit as st
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+import numpy as np
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.http_session import ResilientSession
+from utils.demand_cache import DemandDiskCache, demand_partitions
+from utils.single_flight import SingleFlight
+from utils.instrumentation import ClientMetrics, instrumented
+
+logger = logging.getLogger(__name__)
+
+# Demand columns decoded as numbers; None becomes NaN, so nullable ones turn float
+NUMERIC_DEMAND_COLUMNS = {"id", "outlet_id", "dish_id", "actual_demand", "predicted_demand", "weather_factor"}
+
+class BackgroundFetchError(RuntimeError):
+    """A request failed on a thread with no page to report it on, such as the prefetch thread"""
+
+class _ColumnBuffer:
+    """Column arrays preallocated for an expected row count, grown if more rows arrive"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.size = 0
+        self.columns: Dict[str, np.ndarray] = {}
+    
+    @staticmethod
+    def _as_array(name: str, values: list) -> np.ndarray:
+        if name == 'date':
+            return pd.to_datetime(values, format="ISO8601").to_numpy()
+        if name in NUMERIC_DEMAND_COLUMNS:
+            # Newest rows often lack actuals; all-None must still give float, not object
+            return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+        return pd.Series(values).to_numpy()
+    
+    def append(self, chunk: Dict[str, list]):
+        count = len(next(iter(chunk.values()), []))
+        if self.size + count > self.capacity:
+            self.capacity = max(self.size + count, self.capacity * 2)
+            for name, array in self.columns.items():
+                grown = np.empty(self.capacity, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.columns[name] = grown
+        
+        for name, values in chunk.items():
+            values = self._as_array(name, values)
+            array = self.columns.get(name)
+            if array is None:
+                array = self.columns[name] = np.empty(self.capacity, dtype=values.dtype)
+            elif not np.can_cast(values.dtype, array.dtype):
+                array = self.columns[name] = array.astype(np.result_type(array.dtype, values.dtype))
+            array[self.size:self.size + count] = values
+        self.size += count
+    
+    def view(self, start: int = 0) -> Dict[str, np.ndarray]:
+        """Rows from start up to the filled size of each column; later appends never write into it"""
+        return {name: array[start:self.size] for name, array in self.columns.items()}
 
 class KKCGAPIClient:
     """API client for KKCG Analytics backend"""
     
+    # Columns requested from /demand-data; ids are kept alongside the decoded names
+    DEMAND_FIELDS = "id,outlet_id,dish_id,outlet_name,dish_name,date,actual_demand,predicted_demand,weather_factor"
+    
+    # (connect, read) seconds per path prefix; the longest matching prefix wins
+    ENDPOINT_TIMEOUTS = {
+        "/health": (3.05, 5),
+        "/auth": (3.05, 15),
+        "/demand-data": (3.05, 60),
+        "/demand-data/series": (3.05, 30),
+        "/seed-data": (3.05, 120),
+    }
+    DEFAULT_TIMEOUT = (3.05, 30)
+    # Connections kept alive for all Streamlit sessions sharing the client
+    POOL_SIZE = 32
+    # Demand data survives restarts here, one subdirectory per backend URL
+    DEMAND_CACHE_DIR = os.environ.get("KKCG_CACHE_DIR", "~/.cache/kkcg")
+    # Filter sets kept on disk before the least recently used is evicted
+    DEMAND_CACHE_MAX_ENTRIES = 32
+    # Seconds the last observed backend health counts as current
+    HEALTH_TTL = 15
+    # Client calls kept for the Settings page's performance section
+    METRICS_CAPACITY = 500
+    # Minimum seconds between background prefetch runs
+    PREFETCH_INTERVAL = 60
+    
     def __init__(self, base_url: str = None):
         # Use deployed Railway backend by default
         self.base_url = base_url or "https://web-production-929f.up.railway.app"
@@ -17,66 +102,221 @@ class KKCGAPIClient:
         if self.base_url.endswith('/'):
             self.base_url = self.base_url[:-1]
             
-        self.session = requests.Session()
-        self.session.timeout = 30  # 30 second timeout
+        self.session = ResilientSession(
+            timeouts=self.ENDPOINT_TIMEOUTS,
+            default_timeout=self.DEFAULT_TIMEOUT,
+            pool_size=self.POOL_SIZE
+        )
+        
+        # Last demand frame per filter set with its dataset version, for delta sync.
+        # The client is shared across sessions, so access goes through the lock.
+        self._demand_frames: "OrderedDict[Tuple, Tuple[int, pd.DataFrame]]" = OrderedDict()
+        self._demand_frames_lock = threading.Lock()
+        self.max_demand_frames = 8
+        self._demand_cache = DemandDiskCache(
+            self.DEMAND_CACHE_DIR, self.base_url, self.DEMAND_FIELDS, self.DEMAND_CACHE_MAX_ENTRIES
+        )
+        # Identical demand fetches from concurrent sessions share one request
+        self._demand_flights = SingleFlight()
+        
+        # Timings of recent calls and cache hit counts, shared by all sessions
+        self.metrics = ClientMetrics(self.METRICS_CAPACITY)
+        
+        # Backend health as last observed by any request from any session
+        self._health: Optional[Dict] = None
+        self._health_lock = threading.Lock()
+        self._health_probe_lock = threading.Lock()
+        self._health_refreshing = False
+        self.session.on_result = self._observe_result
+        
+        # Background warm-up of the pages users open next, one run at a time for all sessions
+        self._prefetch_lock = threading.Lock()
+        self._prefetching = False
+        self._prefetched_at: Optional[float] = None
         
         # Test backend connection on initialization
         self._validate_backend()
     
     def _validate_backend(self):
         """Validate that backend is accessible"""
+        health = self.get_health()
+        st.session_state.backend_url = self.base_url
+        if health["ok"]:
+            st.session_state.backend_status = "✅ Connected"
+            return True
+        st.session_state.backend_status = f"❌ Connection failed: {health['error']}"
+        return False
+    
+    def _observe_result(self, response: Optional[requests.Response], error: Optional[Exception], seconds: float):
+        """Update the cached health and timings from any response or connection failure"""
+        url = response.url if response is not None else getattr(error.request, "url", None) or ""
+        if response is not None:
+            # Streamed bodies have no length yet; their readers add it
+            self.metrics.observe_request(urlsplit(url).path, str(response.status_code), seconds,
+                                         int(response.headers.get("Content-Length", 0)))
+        else:
+            self.metrics.observe_request(urlsplit(url).path, type(error).__name__, seconds, 0)
+        
+        with self._health_lock:
+            health = dict(self._health or {"database": None, "dataset_version": None})
+            if response is None or response.status_code >= 500:
+                health["ok"] = False
+                health["error"] = str(error) if error is not None else f"HTTP {response.status_code}"
+            else:
+                health["ok"] = True
+                health["error"] = None
+                version = response.headers.get("X-Dataset-Version")
+                if version and version.isdigit():
+                    health["dataset_version"] = int(version)
+            health["checked_at"] = time.monotonic()
+            self._health = health
+    
+    def _probe_health(self):
+        """Call /health; the session reports the outcome to _observe_result"""
         try:
-            response = self.session.get(f"{self.base_url}/health", timeout=10)
+            response = self.session.get(f"{self.base_url}/health")
             if response.status_code == 200:
                 data = response.json()
-                if data.get("status") == "healthy":
-                    st.session_state.backend_status = "✅ Connected"
-                    st.session_state.backend_url = self.base_url
-                    return True
-        except Exception as e:
-            st.session_state.backend_status = f"❌ Connection failed: {str(e)}"
-            st.session_state.backend_url = self.base_url
-        return False
+                with self._health_lock:
+                    self._health["database"] = data.get("database", "unknown")
+                    if data.get("status") != "healthy":
+                        self._health["ok"] = False
+                        self._health["error"] = f"Backend reported {data.get('status')!r}"
+        except requests.exceptions.RequestException:
+            pass
+        except ValueError as e:
+            with self._health_lock:
+                self._health["ok"] = False
+                self._health["error"] = f"Invalid /health response: {e}"
+    
+    def _refresh_health_in_background(self):
+        try:
+            with self._health_probe_lock:
+                self._probe_health()
+        finally:
+            with self._health_lock:
+                self._health_refreshing = False
+    
+    @instrumented
+    def get_health(self, force: bool = False) -> Dict:
+        """Backend health: ok, error, database and dataset_version
+        
+        Every request the client makes counts as a health observation, so
+        pages rarely need to probe /health at all. A result older than
+        HEALTH_TTL is returned as-is while one background probe refreshes it
+        for all sessions; with no result yet, or force=True, /health is
+        called inline.
+        """
+        with self._health_lock:
+            health = self._health
+            stale = health is None or time.monotonic() - health["checked_at"] > self.HEALTH_TTL
+            # The database mode only comes from /health itself
+            blocking = force or health is None or health["ok"] and health["database"] is None
+            refresh = stale and not blocking and not self._health_refreshing
+            if refresh:
+                self._health_refreshing = True
+        self.metrics.count("Backend health", not blocking)
+        
+        if blocking:
+            checked_at = health["checked_at"] if health else None
+            with self._health_probe_lock:
+                # Another session may have probed while this one waited
+                with self._health_lock:
+                    current = self._health
+                if current is None or current["checked_at"] == checked_at or current["database"] is None:
+                    self._probe_health()
+        elif refresh:
+            threading.Thread(target=self._refresh_health_in_background,
+                             name="kkcg-health", daemon=True).start()
+        
+        with self._health_lock:
+            return dict(self._health)
+    
+    def prefetch(self, warm: Callable[[], None]) -> bool:
+        """Run warm() on a background thread unless a run is in progress or finished recently
+        
+        For loading what the next page will ask for while the user is still
+        on this one. The thread belongs to the shared client, so one run
+        serves every session; failures are only logged, and the client raises
+        BackgroundFetchError instead of returning empty results there, so
+        cached loaders don't keep them. Returns whether a run was started.
+        """
+        with self._prefetch_lock:
+            recent = (self._prefetched_at is not None
+                      and time.monotonic() - self._prefetched_at < self.PREFETCH_INTERVAL)
+            if self._prefetching or recent:
+                return False
+            self._prefetching = True
+        threading.Thread(target=self._run_prefetch, args=(warm,), name="kkcg-prefetch", daemon=True).start()
+        return True
+    
+    def _run_prefetch(self, warm: Callable[[], None]):
+        try:
+            warm()
+        except Exception:
+            logger.exception("Prefetch failed")
+        finally:
+            with self._prefetch_lock:
+                self._prefetching = False
+                self._prefetched_at = time.monotonic()
     
     def get_connection_status(self):
         """Get backend connection status"""
-        try:
-            response = self.session.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                db_status = data.get('database', 'unknown')
-                
-                if db_status == "connected":
-                    return {
-                        "status": "🟢 Live",
-                        "message": "Database",
-                        "color": "green"
-                    }
-                else:
-                    return {
-                        "status": "🟡 Demo",
-                        "message": "Sample Data",
-                        "color": "orange"
-                    }
+        health = self.get_health()
+        if health["ok"]:
+            if health["database"] == "connected":
+                return {
+                    "status": "🟢 Live",
+                    "message": "Database",
+                    "color": "green"
+                }
             else:
-                st.error(f"❌ Backend Error: HTTP {response.status_code}")
-                st.stop()
-        except Exception as e:
-            st.error(f"❌ **Backend Connection Lost**: {str(e)}")
-            st.error(f"🔗 Check: {self.base_url}/health")
-            st.stop()
+                return {
+                    "status": "🟡 Demo",
+                    "message": "Sample Data",
+                    "color": "orange"
+                }
+        
+        st.error(f"❌ **Backend Connection Lost**: {health['error']}")
+        st.error(f"🔗 Check: {self.base_url}/health")
+        # Let the page render with whatever it can load; the breaker keeps further calls cheap
+        return self._offline_status(health["error"])
+    
+    @staticmethod
+    def _offline_status(message: str) -> Dict:
+        return {
+            "status": "🔴 Offline",
+            "message": message,
+            "color": "red"
+        }
+    
+    @staticmethod
+    def _show_error(message: str):
+        """st.error, or raise BackgroundFetchError off the script thread
+        
+        Without a ScriptRunContext st.error and st.stop do nothing, so the
+        usual empty fallback would be returned, and cached, as if it were data.
+        """
+        if get_script_run_ctx(suppress_warning=True) is None:
+            raise BackgroundFetchError(message)
+        st.error(message)
+    
+    @staticmethod
+    def _transient_status(status_code: int) -> bool:
+        """Server errors and rate limiting, which are worth riding out instead of stopping the page"""
+        return status_code >= 500 or status_code == 429
     
     def set_token(self, token: str):
         """Set authentication token"""
         self.session.headers.update({"Authorization": f"Bearer {token}"})
     
+    @instrumented
     def login(self, username: str, password: str) -> Dict:
         """Login to get access token"""
         try:
             response = self.session.post(
                 f"{self.base_url}/auth/login",
-                json={"username": username, "password": password},
-                timeout=30
+                json={"username": username, "password": password}
             )
             
             if response.status_code == 200:
@@ -94,13 +334,13 @@ class KKCGAPIClient:
             st.error(f"❌ **Connection Error**: {str(e)}")
             return {"success": False, "error": f"Connection error: {str(e)}"}
     
+    @instrumented
     def register(self, username: str, email: str, password: str) -> Dict:
         """Register new user"""
         try:
             response = self.session.post(
                 f"{self.base_url}/auth/register",
-                json={"username": username, "email": email, "password": password},
-                timeout=30
+                json={"username": username, "email": email, "password": password}
             )
             
             if response.status_code == 200:
@@ -116,50 +356,330 @@ class KKCGAPIClient:
             st.error(f"❌ **Connection Error**: {str(e)}")
             return {"success": False, "error": f"Connection error: {str(e)}"}
     
+    @instrumented
     def get_outlets(self) -> List[Dict]:
         """Get all outlets - BACKEND REQUIRED"""
         try:
-            response = self.session.get(f"{self.base_url}/outlets", timeout=30)
+            response = self.session.get(f"{self.base_url}/outlets")
             
             if response.status_code == 200:
                 return response.json()
             else:
-                st.error(f"❌ **API Error**: Failed to fetch outlets (HTTP {response.status_code})")
+                self._show_error(f"❌ **API Error**: Failed to fetch outlets (HTTP {response.status_code})")
+                if self._transient_status(response.status_code):
+                    return []
                 st.stop()
         
         except requests.exceptions.Timeout:
-            st.error("❌ **Timeout**: Outlet data request timed out")
-            st.stop()
+            self._show_error("❌ **Timeout**: Outlet data request timed out")
+            return []
+        except requests.exceptions.ConnectionError as e:
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
+            return []
         except requests.exceptions.RequestException as e:
-            st.error(f"❌ **Connection Error**: {str(e)}")
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
             st.stop()
     
+    @instrumented
     def get_dishes(self) -> List[Dict]:
         """Get all dishes - BACKEND REQUIRED"""
         try:
-            response = self.session.get(f"{self.base_url}/dishes", timeout=30)
+            response = self.session.get(f"{self.base_url}/dishes")
             
             if response.status_code == 200:
                 return response.json()
             else:
-                st.error(f"❌ **API Error**: Failed to fetch dishes (HTTP {response.status_code})")
+                self._show_error(f"❌ **API Error**: Failed to fetch dishes (HTTP {response.status_code})")
+                if self._transient_status(response.status_code):
+                    return []
                 st.stop()
         
         except requests.exceptions.Timeout:
-            st.error("❌ **Timeout**: Dish data request timed out")
-            st.stop()
+            self._show_error("❌ **Timeout**: Dish data request timed out")
+            return []
+        except requests.exceptions.ConnectionError as e:
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
+            return []
         except requests.exceptions.RequestException as e:
-            st.error(f"❌ **Connection Error**: {str(e)}")
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
             st.stop()
     
+    @staticmethod
+    def _categorize_names(df: pd.DataFrame) -> pd.DataFrame:
+        """Store outlet and dish names once per distinct value instead of once per row"""
+        for name_column, alias in (('outlet_name', 'outlet'), ('dish_name', 'dish')):
+            if name_column in df.columns:
+                names = df[name_column]
+                if not isinstance(names.dtype, pd.CategoricalDtype):
+                    names = names.astype('category')
+                df[name_column] = names.cat.remove_unused_categories()
+                # Ensure column compatibility
+                df[alias] = df[name_column]
+        return df
+    
+    @staticmethod
+    def _decode_compact(payload: Dict) -> pd.DataFrame:
+        """Decode a compact /demand-data payload, mapping id columns onto Categorical names"""
+        columns = payload["columns"]
+        df = pd.DataFrame(columns)
+        for id_column, name_column, lookup in (('outlet_id', 'outlet_name', payload["outlets"]),
+                                               ('dish_id', 'dish_name', payload["dishes"])):
+            if id_column not in df.columns or not lookup:
+                continue
+            # Categories must be unique, so ids sharing a name share a code
+            names = sorted(set(lookup.values()))
+            code_of_name = {name: code for code, name in enumerate(names)}
+            code_of_id = {int(item_id): code_of_name[name] for item_id, name in lookup.items()}
+            codes = df[id_column].map(code_of_id).fillna(-1).astype('int32')
+            df[name_column] = pd.Categorical.from_codes(codes, categories=names)
+        return df
+    
+    @classmethod
+    def _demand_frame(cls, payload) -> pd.DataFrame:
+        """Build a demand DataFrame with the column names the pages expect"""
+        if isinstance(payload, dict) and payload.get("format") == "compact":
+            df = cls._decode_compact(payload)
+        else:
+            df = pd.DataFrame(payload)
+        if df.empty:
+            return df
+        df['date'] = pd.to_datetime(df['date'], format="ISO8601")
+        for name in NUMERIC_DEMAND_COLUMNS.intersection(df.columns):
+            if df[name].dtype == object:
+                df[name] = pd.to_numeric(df[name], errors="coerce")
+        return cls._categorize_names(df)
+    
+    def _remember_demand_frame(self, key: Tuple, version: Optional[int], df: pd.DataFrame):
+        if version is None:
+            return
+        with self._demand_frames_lock:
+            self._demand_frames[key] = (version, df)
+            self._demand_frames.move_to_end(key)
+            while len(self._demand_frames) > self.max_demand_frames:
+                self._demand_frames.popitem(last=False)
+    
+    def _sync_demand_frame(self, key: Tuple, params: Dict) -> Optional[pd.DataFrame]:
+        """Merge changes since the cached frame's version; None if a full fetch is needed"""
+        with self._demand_frames_lock:
+            cached = self._demand_frames.get(key)
+        self.metrics.count("Demand data (memory)", cached is not None)
+        if cached is None:
+            # Cold start: continue from the copy on disk
+            cached = self._demand_cache.load(key)
+            self.metrics.count("Demand data (disk)", cached is not None)
+            if cached is None:
+                return None
+            # Months are stored separately, so their category sets may differ
+            cached = (cached[0], self._categorize_names(cached[1]))
+        version, cached_df = cached
+        
+        try:
+            response = self.session.get(
+                f"{self.base_url}/demand-data",
+                params={**params, "fields": self.DEMAND_FIELDS, "since_version": version}
+            )
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        
+        delta = response.json()
+        # An older version means the backend's database was replaced
+        if delta.get("full_refresh") or delta["version"] < version:
+            return None
+        
+        df = cached_df
+        months = set()
+        if delta["deletes"] or delta["upserts"]:
+            # Deletes first: ids can be reused by rows inserted in the same delta
+            upserts = self._demand_frame(delta["upserts"])
+            stale_ids = set(delta["deletes"]) | set(upserts['id'] if not upserts.empty else [])
+            if not df.empty:
+                stale = df['id'].isin(stale_ids)
+                months.update(demand_partitions(df[stale]))
+                df = df[~stale]
+            if not upserts.empty:
+                months.update(demand_partitions(upserts))
+            df = pd.concat([df, upserts], ignore_index=True) if not upserts.empty else df.reset_index(drop=True)
+            if not df.empty:
+                # Concatenating different category sets falls back to object columns
+                df = self._categorize_names(df.sort_values('id', ignore_index=True))
+        
+        self._remember_demand_frame(key, delta["version"], df)
+        if months or delta["version"] != version:
+            self._demand_cache.store(key, delta["version"], df, months)
+        return df
+    
+    @staticmethod
+    def _demand_params(start_date: Optional[datetime], end_date: Optional[datetime],
+                       outlet_id: Optional[int], dish_id: Optional[int]) -> Dict:
+        params = {}
+        if start_date:
+            params["start_date"] = start_date.isoformat()
+        if end_date:
+            params["end_date"] = end_date.isoformat()
+        if outlet_id:
+            params["outlet_id"] = outlet_id
+        if dish_id:
+            params["dish_id"] = dish_id
+        return params
+    
+    def has_demand_frame(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         outlet_id: Optional[int] = None,
+                         dish_id: Optional[int] = None) -> bool:
+        """Whether demand data for these filters is held in memory or on disk, so a fetch only syncs changes"""
+        key = tuple(sorted(self._demand_params(start_date, end_date, outlet_id, dish_id).items()))
+        with self._demand_frames_lock:
+            if key in self._demand_frames:
+                return True
+        return self._demand_cache.contains(key)
+    
+    def _load_demand_frame(self, key: Tuple, params: Dict) -> Tuple[Optional[pd.DataFrame], int]:
+        """(frame, 200) synced or fetched for a filter set, (None, status) if the backend refused
+        
+        Shared by every session waiting on the same filters, so it must not
+        touch Streamlit; callers report failures themselves.
+        """
+        df = self._sync_demand_frame(key, params)
+        if df is not None:
+            return df, 200
+        
+        response = self.session.get(
+            f"{self.base_url}/demand-data",
+            params={**params, "fields": self.DEMAND_FIELDS, "format": "compact"}
+        )
+        if response.status_code != 200:
+            return None, response.status_code
+        
+        payload = response.json()
+        df = self._demand_frame(payload)
+        # The payload's version was read before the rows; the response header can be newer
+        version = payload.get("version") if isinstance(payload, dict) else None
+        if version is not None:
+            self._remember_demand_frame(key, version, df)
+            self._demand_cache.store(key, version, df)
+        return df, 200
+    
+    @instrumented
     def get_demand_data(self, 
                        start_date: Optional[datetime] = None,
                        end_date: Optional[datetime] = None,
                        outlet_id: Optional[int] = None,
                        dish_id: Optional[int] = None) -> pd.DataFrame:
-        """Get demand data as DataFrame - BACKEND REQUIRED"""
+        """Get demand data as DataFrame - BACKEND REQUIRED
+        
+        Rows arrive in compact form (ids plus one outlet and dish lookup table)
+        and names are decoded into Categorical columns. Repeat calls with the
+        same filters only download rows changed since the previous call and
+        merge them into the last result, which is also kept on disk so a
+        restarted server resumes from it. Sessions asking for the same filters
+        at the same time wait for one request and share its result.
+        """
         try:
-            params = {}
+            params = self._demand_params(start_date, end_date, outlet_id, dish_id)
+            key = tuple(sorted(params.items()))
+            df, status_code = self._demand_flights.do(key, lambda: self._load_demand_frame(key, params))
+            if df is None:
+                self._show_error(f"❌ **API Error**: Failed to fetch demand data (HTTP {status_code})")
+                if self._transient_status(status_code):
+                    return pd.DataFrame()
+                st.stop()
+            
+            if df.empty:
+                st.warning("⚠️ **No Data**: Backend returned empty dataset")
+                return pd.DataFrame()
+            # Callers may modify the frame; keep the cached copy intact
+            return df.copy()
+        
+        except requests.exceptions.Timeout:
+            self._show_error("❌ **Timeout**: Demand data request timed out")
+            return pd.DataFrame()
+        except requests.exceptions.ConnectionError as e:
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
+            return pd.DataFrame()
+        except requests.exceptions.RequestException as e:
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
+            st.stop()
+    
+    @instrumented
+    def iter_demand_data(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         outlet_id: Optional[int] = None,
+                         dish_id: Optional[int] = None,
+                         chunk_rows: Optional[int] = None) -> Iterator[Tuple[pd.DataFrame, int, int]]:
+        """Stream demand data, yielding (new rows, rows loaded, rows expected) per chunk
+        
+        Rows arrive newest first as NDJSON. Each chunk is decoded once,
+        yielded on its own and appended to preallocated column arrays, so a
+        page can draw recent weeks while older history is still loading
+        without reprocessing what it already has. The finished frame is kept
+        like get_demand_data's, so later calls with the same filters only
+        sync changes. Failures, including malformed lines, show an error and
+        end the iteration early without keeping anything.
+        """
+        params = self._demand_params(start_date, end_date, outlet_id, dish_id)
+        key = tuple(sorted(params.items()))
+        stream_params = {**params, "fields": self.DEMAND_FIELDS, "format": "ndjson"}
+        if chunk_rows:
+            stream_params["chunk_rows"] = chunk_rows
+        
+        try:
+            with self.session.get(f"{self.base_url}/demand-data", params=stream_params, stream=True) as response:
+                if response.status_code != 200:
+                    st.error(f"❌ **API Error**: Failed to stream demand data (HTTP {response.status_code})")
+                    return
+                
+                def read_messages():
+                    for line in response.iter_lines():
+                        self.metrics.add_bytes(len(line) + 1)
+                        if line:
+                            yield json.loads(line)
+                
+                messages = read_messages()
+                header = next(messages, None)
+                if header is None or header.get("type") != "header":
+                    st.error("❌ **API Error**: Demand data stream ended before its header")
+                    return
+                
+                buffer = _ColumnBuffer(header["count"])
+                lookups = {"outlets": header["outlets"], "dishes": header["dishes"]}
+                for message in messages:
+                    if message["type"] == "error":
+                        st.error(f"❌ **API Error**: {message['detail']}")
+                        return
+                    start = buffer.size
+                    buffer.append(message["columns"])
+                    chunk = self._demand_frame({"format": "compact", "columns": buffer.view(start), **lookups})
+                    yield chunk, buffer.size, max(header["count"], buffer.size)
+                
+                df = self._demand_frame({"format": "compact", "columns": buffer.view(), **lookups})
+        
+        except requests.exceptions.RequestException as e:
+            st.error(f"❌ **Connection Error**: {str(e)}")
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            # Malformed JSON or values the columns can't hold
+            st.error(f"❌ **API Error**: Invalid demand data stream: {str(e)}")
+            return
+        
+        if not df.empty:
+            df = df.sort_values('id', ignore_index=True)
+        self._remember_demand_frame(key, header["version"], df)
+        self._demand_cache.store(key, header["version"], df)
+    
+    @instrumented
+    def get_demand_series(self,
+                          bucket: str = "day",
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          outlet_id: Optional[int] = None,
+                          dish_id: Optional[int] = None) -> pd.DataFrame:
+        """Get gap-filled demand totals per day, week or month as DataFrame"""
+        try:
+            params = {"bucket": bucket}
             if start_date:
                 params["start_date"] = start_date.isoformat()
             if end_date:
@@ -170,58 +690,215 @@ class KKCGAPIClient:
                 params["dish_id"] = dish_id
             
             response = self.session.get(
-                f"{self.base_url}/demand-data",
-                params=params,
-                timeout=30
+                f"{self.base_url}/demand-data/series",
+                params=params
+            )
+            
+            if response.status_code == 200:
+                df = pd.DataFrame(response.json())
+                if not df.empty:
+                    df['date'] = pd.to_datetime(df['date'], format="ISO8601")
+                return df
+            return pd.DataFrame()
+        
+        except requests.exceptions.RequestException:
+            return pd.DataFrame()
+    
+    @instrumented
+    def get_demand_matrix(self,
+                          rows: str = "dish",
+                          cols: str = "outlet",
+                          agg: str = "mean",
+                          metric: str = "predicted_demand",
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          top_n: Optional[int] = None) -> pd.DataFrame:
+        """Get an aggregated rows x cols matrix (e.g. dish by outlet) as DataFrame"""
+        try:
+            params = {"rows": rows, "cols": cols, "agg": agg, "metric": metric}
+            if start_date:
+                params["start_date"] = start_date.isoformat()
+            if end_date:
+                params["end_date"] = end_date.isoformat()
+            if top_n:
+                params["top_n"] = top_n
+            
+            response = self.session.get(
+                f"{self.base_url}/analytics/matrix",
+                params=params
             )
             
             if response.status_code == 200:
                 data = response.json()
-                if data:
-                    df = pd.DataFrame(data)
-                    df['date'] = pd.to_datetime(df['date'])
-                    # Ensure column compatibility
-                    if 'outlet_name' in df.columns:
-                        df['outlet'] = df['outlet_name']
-                    if 'dish_name' in df.columns:
-                        df['dish'] = df['dish_name']
-                    return df
-                else:
-                    st.warning("⚠️ **No Data**: Backend returned empty dataset")
+                if not data["values"]:
                     return pd.DataFrame()
-            else:
-                st.error(f"❌ **API Error**: Failed to fetch demand data (HTTP {response.status_code})")
-                st.stop()
+                values = np.asarray(data["values"], dtype=float).reshape(len(data["row_labels"]), len(data["col_labels"]))
+                return pd.DataFrame(
+                    values,
+                    index=pd.Index(data["row_labels"], name=rows),
+                    columns=pd.Index(data["col_labels"], name=cols)
+                )
+            return pd.DataFrame()
         
-        except requests.exceptions.Timeout:
-            st.error("❌ **Timeout**: Demand data request timed out")
-            st.stop()
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ **Connection Error**: {str(e)}")
-            st.stop()
+        except requests.exceptions.RequestException:
+            return pd.DataFrame()
     
+    def get_export_url(self,
+                       format: str = "csv",
+                       start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       outlet_id: Optional[int] = None,
+                       dish_id: Optional[int] = None) -> str:
+        """Build a download URL for the backend's streaming demand export"""
+        params = {"format": format}
+        if start_date:
+            params["start_date"] = start_date.isoformat()
+        if end_date:
+            params["end_date"] = end_date.isoformat()
+        if outlet_id:
+            params["outlet_id"] = outlet_id
+        if dish_id:
+            params["dish_id"] = dish_id
+        return f"{self.base_url}/export/demand?{urlencode(params)}"
+    
+    @instrumented
     def get_analytics_summary(self) -> Dict:
         """Get analytics summary - BACKEND REQUIRED"""
         try:
-            response = self.session.get(f"{self.base_url}/analytics/summary", timeout=30)
+            response = self.session.get(f"{self.base_url}/analytics/summary")
             
             if response.status_code == 200:
                 return response.json()
             else:
-                st.error(f"❌ **API Error**: Failed to fetch analytics (HTTP {response.status_code})")
+                self._show_error(f"❌ **API Error**: Failed to fetch analytics (HTTP {response.status_code})")
+                if self._transient_status(response.status_code):
+                    return {}
                 st.stop()
         
         except requests.exceptions.Timeout:
-            st.error("❌ **Timeout**: Analytics request timed out")
-            st.stop()
+            self._show_error("❌ **Timeout**: Analytics request timed out")
+            return {}
+        except requests.exceptions.ConnectionError as e:
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
+            return {}
         except requests.exceptions.RequestException as e:
-            st.error(f"❌ **Connection Error**: {str(e)}")
+            self._show_error(f"❌ **Connection Error**: {str(e)}")
             st.stop()
     
+    @instrumented
+    def get_period_comparison(self, period: str = "week", group_by: Optional[str] = None) -> Optional[Dict]:
+        """Get current vs previous period totals, None if unavailable"""
+        try:
+            params = {"period": period}
+            if group_by:
+                params["group_by"] = group_by
+            
+            response = self.session.get(
+                f"{self.base_url}/analytics/compare",
+                params=params
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            return None
+        
+        except requests.exceptions.RequestException:
+            return None
+    
+    @instrumented
+    def get_top_items(self,
+                      partition: Optional[str] = None,
+                      item: Optional[str] = None,
+                      rank_by: str = "sum(predicted_demand)",
+                      n: int = 5,
+                      order: str = "desc",
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """Get the top (or bottom) n items per partition, ranked by the backend; None if unavailable"""
+        try:
+            params = {"rank_by": rank_by, "n": n, "order": order}
+            if partition:
+                params["partition"] = partition
+            if item:
+                params["item"] = item
+            if start_date:
+                params["start_date"] = start_date.isoformat()
+            if end_date:
+                params["end_date"] = end_date.isoformat()
+            
+            response = self.session.get(
+                f"{self.base_url}/analytics/top",
+                params=params
+            )
+            
+            if response.status_code == 200:
+                return response.json()["groups"]
+            return None
+        
+        except requests.exceptions.RequestException:
+            return None
+    
+    @instrumented
+    def get_forecast_accuracy(self, group_by: Optional[str] = None, window: int = 30) -> Optional[Dict]:
+        """Get MAPE, WAPE, bias and RMSE of predicted vs actual demand, None if unavailable"""
+        try:
+            params = {"window": window}
+            if group_by:
+                params["group_by"] = group_by
+            
+            response = self.session.get(
+                f"{self.base_url}/analytics/accuracy",
+                params=params
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            return None
+        
+        except requests.exceptions.RequestException:
+            return None
+    
+    @instrumented
+    def get_latest_forecasts(self,
+                             model_version: Optional[str] = None,
+                             horizon_days: Optional[int] = None) -> pd.DataFrame:
+        """Get the latest precomputed forecast run as DataFrame, empty if there is none"""
+        try:
+            params = {}
+            if model_version:
+                params["model_version"] = model_version
+            if horizon_days:
+                params["horizon_days"] = horizon_days
+            
+            response = self.session.get(
+                f"{self.base_url}/forecasts/latest",
+                params=params
+            )
+            
+            if response.status_code != 200:
+                return pd.DataFrame()
+            
+            df = pd.DataFrame(response.json()["forecasts"])
+            if df.empty:
+                return df
+            # Same columns as utils.forecasting_utils.create_forecast_data
+            return pd.DataFrame({
+                'date': pd.to_datetime(df['target_date'], format="ISO8601"),
+                'dish': df['dish_name'],
+                'outlet': df['outlet_name'],
+                'predicted_demand': df['predicted'].round(0),
+                'confidence_lower': df['lower'].round(0),
+                'confidence_upper': df['upper'].round(0)
+            })
+        
+        except requests.exceptions.RequestException:
+            return pd.DataFrame()
+    
+    @instrumented
     def seed_database(self) -> Dict:
         """Seed database with sample data"""
         try:
-            response = self.session.post(f"{self.base_url}/seed-data", timeout=60)
+            response = self.session.post(f"{self.base_url}/seed-data")
             
             if response.status_code == 200:
                 return {"success": True, "message": response.json()["message"]}
@@ -234,13 +911,61 @@ class KKCGAPIClient:
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Connection error: {str(e)}"}
     
-    def health_check(self) -> bool:
-        """Check if backend is accessible"""
-        try:
-            response = self.session.get(f"{self.base_url}/health", timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def cache_hit_rates(self) -> pd.DataFrame:
+        """Hits and misses of the client's caches, including demand fetches served by another session's request"""
+        flights = self._demand_flights
+        return self.metrics.cache_hit_rates({"Demand fetches (coalesced)": (flights.shared, flights.calls)})
+    
+    def demand_memory_usage(self) -> int:
+        """Bytes held by the demand frames kept for delta sync"""
+        with self._demand_frames_lock:
+            frames = [df for _, df in self._demand_frames.values()]
+        return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+    
+    def get_dataset_version(self) -> Optional[int]:
+        """Get the backend's dataset version; changes whenever demand data does"""
+        return self.get_health()["dataset_version"]
+    
+    def fetch_many(self, calls: Dict[str, object]) -> Dict[str, object]:
+        """Run independent client calls concurrently and return their results by key
+        
+        Each call is a method name or any callable, optionally paired with a
+        kwargs dict, e.g.
+        ``fetch_many({"outlets": "get_outlets", "demand": ("get_demand_data", {"dish_id": 3})})``.
+        The requests overlap, so the wait approaches the slowest call instead of
+        their sum. Workers run in the caller's Streamlit script context, so
+        st.error and st.stop behave as in a direct call; once every call has
+        finished, the first exception (in call order) is re-raised here.
+        """
+        results, errors = {}, {}
+        
+        def run(key, method, kwargs):
+            try:
+                results[key] = method(**kwargs)
+            except BaseException as e:  # st.stop() raises outside Exception
+                errors[key] = e
+        
+        threads = []
+        for key, call in calls.items():
+            target, kwargs = call if isinstance(call, tuple) else (call, {})
+            method = getattr(self, target) if isinstance(target, str) else target
+            thread = threading.Thread(target=run, args=(key, method, kwargs),
+                                      name=f"kkcg-fetch-{key}", daemon=True)
+            # Attach before start so st.* calls in the worker reach this session
+            add_script_run_ctx(thread)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        
+        for key in calls:
+            if key in errors:
+                raise errors[key]
+        return results
+    
+    def health_check(self, force: bool = False) -> bool:
+        """Check if backend is accessible, from the cached health unless forced"""
+        return self.get_health(force)["ok"]
 
 # Global API client instance
 @st.cache_resource
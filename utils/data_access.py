@@ -0,0 +1,239 @@
+"""
+Shared data access for KKCG Analytics Dashboard pages
+
+Every page reads the demand dataset through load_demand_data, so one cached
+copy per filter set serves the whole app instead of one per page. The
+Forecasting Tool and Heatmap loaders live here too, so prefetch_page_data
+can warm exactly the cache entries those pages ask for.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from utils.api_client import BackgroundFetchError, get_api_client
+from utils.heatmap_utils import choose_time_bucket
+
+# Seconds a loaded dataset is reused before it is synced with the backend again
+DEMAND_CACHE_TTL = 600
+# Distinct filter sets kept in memory at once
+DEMAND_CACHE_MAX_ENTRIES = 8
+# Outlets and dishes change rarely
+DIMENSION_CACHE_TTL = 3600
+
+ALL_OUTLETS = "All Outlets"
+ALL_DISHES = "All Dishes"
+# Forecasting Tool horizons in days; the first is preselected
+FORECAST_HORIZONS = [7, 14, 30]
+# Heatmap metric and aggregation selected on arrival
+DEFAULT_HEATMAP_METRIC = "predicted_demand"
+DEFAULT_HEATMAP_AGG = "mean"
+
+
+def normalize_demand_columns(df):
+    """
+    Ensure the columns the pages expect: datetime 'date' plus 'dish' and 'outlet' names
+    """
+    if df.empty:
+        return df
+
+    for alias, source in (('dish', 'dish_name'), ('outlet', 'outlet_name')):
+        if alias not in df.columns and source in df.columns:
+            df[alias] = df[source]
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+
+    return df
+
+
+def load_demand_data(start_date=None, end_date=None, outlet_id=None, dish_id=None):
+    """
+    Load demand data from backend API, shared by all pages
+
+    Returns an empty DataFrame when the backend has no data or can't be
+    reached; client.health_check() tells the two apart.
+    """
+    # st.cache_data keys on how arguments are passed; pass them one way only
+    return _load_demand_data(start_date, end_date, outlet_id, dish_id)
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_demand_data(start_date, end_date, outlet_id, dish_id):
+    try:
+        client = get_api_client()
+        df = client.get_demand_data(
+            start_date=start_date, end_date=end_date,
+            outlet_id=outlet_id, dish_id=dish_id
+        )
+        return normalize_demand_columns(df)
+    except BackgroundFetchError:
+        raise
+    except Exception as e:
+        st.error(f"❌ **Data loading error**: {str(e)}")
+        return pd.DataFrame()
+
+
+def load_demand_data_progressively(on_chunk, start_date=None, end_date=None, outlet_id=None, dish_id=None):
+    """
+    load_demand_data, streaming a first download so the page can draw early
+
+    When the client holds nothing for these filters yet, rows are streamed
+    newest first and on_chunk(chunk, loaded, total) is called with each
+    chunk's new rows. The finished download is kept by the client, so the
+    cached load that follows only syncs changes; if streaming fails, that
+    load fetches everything instead.
+    """
+    filters = dict(start_date=start_date, end_date=end_date, outlet_id=outlet_id, dish_id=dish_id)
+    try:
+        client = get_api_client()
+        if not client.has_demand_frame(**filters):
+            for chunk, loaded, total in client.iter_demand_data(**filters):
+                on_chunk(normalize_demand_columns(chunk), loaded, total)
+    except Exception as e:
+        st.warning(f"⚠️ **Progressive loading failed**: {str(e)}")
+    return load_demand_data(**filters)
+
+
+@st.cache_data(ttl=DIMENSION_CACHE_TTL, show_spinner=False)
+def load_dimensions():
+    """
+    Outlet and dish name -> ids lookups from the backend
+
+    Names map to lists because nothing stops two outlets (or dishes) from
+    sharing one.
+    """
+    client = get_api_client()
+    results = client.fetch_many({"outlets": "get_outlets", "dishes": "get_dishes"})
+    dimensions = {}
+    for key in ("outlets", "dishes"):
+        lookup = {}
+        for item in results[key] or []:
+            lookup.setdefault(item["name"], []).append(item["id"])
+        dimensions[key] = lookup
+    return dimensions
+
+
+def resolve_filter_ids(dimensions, outlet_name=ALL_OUTLETS, dish_name=ALL_DISHES):
+    """
+    Map selected names to (outlet_id, dish_id) for the API
+
+    "All ..." selections, unknown names and names shared by several ids give
+    None, so the backend returns the wider slice and name filtering still
+    happens in pandas.
+    """
+    def resolve(lookup, name, everything):
+        ids = lookup.get(name, []) if name != everything else []
+        return ids[0] if len(ids) == 1 else None
+
+    return (resolve(dimensions["outlets"], outlet_name, ALL_OUTLETS),
+            resolve(dimensions["dishes"], dish_name, ALL_DISHES))
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, show_spinner=False)
+def load_date_bounds():
+    """
+    First and last demand date as Timestamps, (None, None) if unknown
+    """
+    client = get_api_client()
+    summary = client.get_analytics_summary() or {}
+    if not summary.get("first_date") or not summary.get("last_date"):
+        return None, None
+    return pd.Timestamp(summary["first_date"]), pd.Timestamp(summary["last_date"])
+
+
+def day_range(start_date, end_date):
+    """
+    Datetimes covering whole days from start_date through end_date
+    """
+    return (datetime.combine(pd.Timestamp(start_date).date(), datetime.min.time()),
+            datetime.combine(pd.Timestamp(end_date).date(), datetime.max.time()))
+
+
+@st.cache_data(ttl=300)
+def load_precomputed_forecasts(horizon_days):
+    """
+    Load the latest stored forecast run for the selected horizon
+    """
+    client = get_api_client()
+    return client.get_latest_forecasts(horizon_days=horizon_days)
+
+
+@st.cache_data(ttl=300)
+def load_forecast_accuracy(window=30):
+    """
+    Load measured forecast accuracy; the backend keeps it in a daily rollup
+    """
+    client = get_api_client()
+    return client.get_forecast_accuracy(window=window)
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES)
+def load_heatmap_matrix(metric, agg, start_date, end_date):
+    """
+    Load the dish x outlet matrix, aggregated by the backend
+    """
+    client = get_api_client()
+    return client.get_demand_matrix(
+        rows='dish', cols='outlet', agg=agg, metric=metric,
+        start_date=start_date, end_date=end_date
+    )
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES)
+def load_top_rankings(n, start_date, end_date):
+    """
+    Load the top outlets and dishes by total predicted demand, fetched concurrently
+    """
+    client = get_api_client()
+    return client.fetch_many({
+        item: ("get_top_items", {"item": item, "n": n, "start_date": start_date, "end_date": end_date})
+        for item in ('outlet', 'dish')
+    })
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES)
+def load_trend_series(bucket, start_date, end_date):
+    """
+    Load bucketed, gap-filled demand totals for the trend chart
+    """
+    client = get_api_client()
+    return client.get_demand_series(bucket=bucket, start_date=start_date, end_date=end_date)
+
+
+@st.cache_data(ttl=DEMAND_CACHE_TTL, max_entries=DEMAND_CACHE_MAX_ENTRIES)
+def load_peak_demand(start_date, end_date):
+    """
+    Load the largest single predicted demand in the range, None if unknown
+    """
+    client = get_api_client()
+    groups = client.get_top_items(item='dish', rank_by='max(predicted_demand)', n=1,
+                                  start_date=start_date, end_date=end_date)
+    items = groups[0]['items'] if groups else []
+    return items[0]['value'] if items else None
+
+
+def prefetch_page_data():
+    """
+    Load what the Forecasting Tool and Heatmap show on arrival
+
+    Runs on the client's prefetch thread after Home renders. The calls
+    match the pages' own, default selections included, so switching to
+    either page finds them cached. A failed request raises there and ends
+    the run, leaving that load and the rest to the pages themselves.
+    """
+    load_dimensions()
+    first_date, last_date = load_date_bounds()
+    load_demand_data()
+    load_precomputed_forecasts(FORECAST_HORIZONS[0])
+    load_forecast_accuracy()
+    if first_date is None:
+        return
+
+    range_start, range_end = day_range(first_date, last_date)
+    load_heatmap_matrix(DEFAULT_HEATMAP_METRIC, DEFAULT_HEATMAP_AGG, range_start, range_end)
+    load_top_rankings(5, range_start, range_end)
+    load_trend_series('day', range_start, range_end)
+    load_trend_series(choose_time_bucket(range_start, range_end), range_start, range_end)
+    load_peak_demand(range_start, range_end)
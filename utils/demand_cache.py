@@ -0,0 +1,163 @@
+"""
+On-disk cache of demand data for the KKCG API client.
+
+Each filter set gets a directory under the backend's cache directory holding
+one Parquet file per month of data plus a manifest with the dataset version
+the files reflect. The client loads it on a cold start and then only asks
+the backend for changes since that version; applying those changes rewrites
+just the months they touch.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401  Parquet engine
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, default=str).encode()).hexdigest()[:16]
+
+
+def demand_partitions(df: pd.DataFrame) -> pd.Series:
+    """Partition label (YYYY-MM) of each row"""
+    return df['date'].dt.strftime('%Y-%m')
+
+
+class DemandDiskCache:
+    """Demand frames stored as monthly Parquet partitions, keyed by backend URL and filters
+
+    At most max_entries filter sets are kept; the least recently used go
+    first. Every method swallows I/O errors: a broken cache only costs a
+    full fetch.
+    """
+
+    def __init__(self, root: str, base_url: str, fields: str, max_entries: int = 32):
+        self.enabled = PARQUET_AVAILABLE
+        self.root = os.path.join(os.path.expanduser(root), _digest(base_url))
+        self.base_url = base_url
+        self.fields = fields
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _directory(self, key: Tuple) -> str:
+        return os.path.join(self.root, _digest([self.fields, list(key)]))
+
+    @staticmethod
+    def _replace(path: str, write):
+        # Write beside the target and swap, so readers never see half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp)
+        os.replace(tmp, path)
+
+    def contains(self, key: Tuple) -> bool:
+        return self.enabled and os.path.exists(os.path.join(self._directory(key), MANIFEST))
+
+    def load(self, key: Tuple) -> Optional[Tuple[int, pd.DataFrame]]:
+        """(dataset version, frame) stored for a filter set, None if missing or unreadable"""
+        if not self.enabled:
+            return None
+        directory = self._directory(key)
+        try:
+            with self._lock:
+                manifest_path = os.path.join(directory, MANIFEST)
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                # The manifest's mtime records the last use, for eviction
+                os.utime(manifest_path)
+                if manifest.get("format") != FORMAT_VERSION or manifest.get("fields") != self.fields:
+                    return None
+                frames = [pd.read_parquet(os.path.join(directory, f"{month}.parquet"))
+                          for month in manifest["partitions"]]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable demand cache {directory}: {e}")
+            return None
+        if not frames:
+            return manifest["version"], pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        return manifest["version"], df.sort_values('id', ignore_index=True)
+
+    def store(self, key: Tuple, version: int, df: pd.DataFrame,
+              months: Optional[Iterable[str]] = None):
+        """Persist a frame at a dataset version, rewriting only the given months if known
+
+        Partitions are replaced before the manifest, so an interrupted store
+        leaves rows newer than the recorded version; re-applying the changes
+        since that version is harmless.
+        """
+        if not self.enabled:
+            return
+        directory = self._directory(key)
+        try:
+            with self._lock:
+                os.makedirs(directory, exist_ok=True)
+                labels = demand_partitions(df) if not df.empty else pd.Series(dtype=str)
+                present = sorted(labels.unique())
+                stale = set()
+                if months is None:
+                    months = present
+                    stale = {name[:-len(".parquet")] for name in os.listdir(directory)
+                             if name.endswith(".parquet")} - set(present)
+                for month in months:
+                    path = os.path.join(directory, f"{month}.parquet")
+                    part = df[labels == month]
+                    if part.empty:
+                        stale.add(month)
+                    else:
+                        self._replace(path, lambda tmp: part.to_parquet(tmp, index=False))
+                for month in stale:
+                    try:
+                        os.remove(os.path.join(directory, f"{month}.parquet"))
+                    except FileNotFoundError:
+                        pass
+
+                manifest = {
+                    "format": FORMAT_VERSION,
+                    "base_url": self.base_url,
+                    "fields": self.fields,
+                    "filters": dict(key),
+                    "version": version,
+                    "rows": len(df),
+                    "partitions": present,
+                }
+                self._replace(os.path.join(directory, MANIFEST),
+                              lambda tmp: self._write_json(tmp, manifest))
+                self._evict()
+        except Exception as e:
+            logger.warning(f"Failed to write demand cache {directory}: {e}")
+
+    def _evict(self):
+        """Drop the least recently used filter sets beyond max_entries"""
+        entries = []
+        for name in os.listdir(self.root):
+            directory = os.path.join(self.root, name)
+            try:
+                entries.append((os.path.getmtime(os.path.join(directory, MANIFEST)), directory))
+            except OSError:
+                # No manifest: an interrupted first store, or not ours
+                continue
+        entries.sort(reverse=True)
+        for _, directory in entries[self.max_entries:]:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path: str, payload):
+        with open(path, "w") as f:
+            json.dump(payload, f)
@@ -22,7 +22,7 @@ def create_demand_heatmap(data, value_mode='predicted_demand', top_n_dishes=None
         
         # Filter top dishes if specified
         if top_n_dishes and top_n_dishes > 0:
-            top_dishes = data.groupby('dish')[value_mode].sum().nlargest(top_n_dishes).index
+            top_dishes = data.groupby('dish', observed=True)[value_mode].sum().nlargest(top_n_dishes).index
             data = data[data['dish'].isin(top_dishes)]
         
         # Create pivot table
@@ -31,7 +31,8 @@ def create_demand_heatmap(data, value_mode='predicted_demand', top_n_dishes=None
             index='dish',
             columns='outlet',
             aggfunc='mean',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
         
         if pivot_data.empty:
@@ -91,11 +92,11 @@ def generate_ai_insights(data):
         
         # Add performance insights
         if 'dish' in data.columns and 'predicted_demand' in data.columns:
-            top_dish = data.groupby('dish')['predicted_demand'].sum().idxmax()
+            top_dish = data.groupby('dish', observed=True)['predicted_demand'].sum().idxmax()
             insights.append(f"🥇 Top performing dish: {top_dish}")
         
         if 'outlet' in data.columns and 'predicted_demand' in data.columns:
-            top_outlet = data.groupby('outlet')['predicted_demand'].sum().idxmax()
+            top_outlet = data.groupby('outlet', observed=True)['predicted_demand'].sum().idxmax()
             insights.append(f"🏆 Top performing outlet: {top_outlet}")
         
         return insights
@@ -145,10 +146,10 @@ def generate_comparison_bar_chart(data, comparison_type="outlet"):
     
     try:
         if comparison_type == "outlet" and 'outlet' in data.columns:
-            grouped_data = data.groupby('outlet')['predicted_demand'].sum().sort_values(ascending=True)
+            grouped_data = data.groupby('outlet', observed=True)['predicted_demand'].sum().sort_values(ascending=True)
             title = "Outlet Performance Comparison"
         elif comparison_type == "dish" and 'dish' in data.columns:
-            grouped_data = data.groupby('dish')['predicted_demand'].sum().sort_values(ascending=True)
+            grouped_data = data.groupby('dish', observed=True)['predicted_demand'].sum().sort_values(ascending=True)
             title = "Dish Performance Comparison"
         else:
             return None
@@ -221,6 +222,17 @@ def generate_trend_chart(data, dish_name=None, outlet_name=None):
     except Exception:
         return None
 
+def choose_time_bucket(start_date, end_date, max_points=120):
+    """
+    Pick the finest series bucket (day, week, month) that keeps a chart under max_points
+    """
+    days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1
+    if days <= max_points:
+        return 'day'
+    if days / 7 <= max_points:
+        return 'week'
+    return 'month'
+
 # Additional utility functions for compatibility
 def calculate_heatmap_statistics(data):
     """Calculate statistics for heatmap display"""
@@ -0,0 +1,162 @@
+"""
+HTTP session for the KKCG API client.
+
+One session is shared by every Streamlit session through the cached client, so
+it keeps a sized pool of keep-alive connections, retries idempotent GETs with
+jittered exponential backoff, applies connect/read timeouts per endpoint and
+stops calling a backend that keeps failing until it has had time to recover.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Tuple[float, float]
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+
+class JitteredRetry(Retry):
+    """Exponential backoff with random jitter so concurrent retries spread out"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class CircuitBreaker:
+    """Open after consecutive failures, then let one trial request through per cooldown"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited >= self.reset_seconds and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(self.reset_seconds - waited, 0)
+        raise CircuitOpenError(f"Backend unavailable after repeated failures; retrying in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def cancel_trial(self):
+        """Free the half-open slot when a request failed for reasons unrelated to the backend"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class ResilientSession(requests.Session):
+    """requests.Session with pooled retrying connections, endpoint timeouts and a circuit breaker
+
+    ``timeouts`` maps path prefixes to (connect, read) seconds; the longest
+    matching prefix wins and an explicit ``timeout=`` still overrides it.
+    Connection errors, timeouts and 5xx responses count as failures.
+    ``on_result(response, error, seconds)`` is called after every request
+    with exactly one of response and error set, plus the time it took
+    including retries, so callers can learn from traffic they didn't send
+    themselves.
+    """
+
+    def __init__(self,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 default_timeout: Timeout = (3.05, 30),
+                 pool_size: int = 32,
+                 retries: int = 3,
+                 backoff_factor: float = 0.3,
+                 breaker: Optional[CircuitBreaker] = None):
+        super().__init__()
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.on_result: Optional[Callable[[Optional[requests.Response], Optional[Exception], float], None]] = None
+
+        retry = JitteredRetry(
+            total=retries,
+            connect=retries,
+            # A read timeout already cost a full read window; retry it once
+            read=1,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def timeout_for(self, url: str) -> Timeout:
+        path = urlsplit(url).path
+        matches = [prefix for prefix in self.timeouts if path.startswith(prefix)]
+        return self.timeouts[max(matches, key=len)] if matches else self.default_timeout
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout_for(url)
+
+        started = time.perf_counter()
+        try:
+            self.breaker.before_request()
+        except CircuitOpenError as e:
+            # Nothing was sent, but observers still want to know what was refused
+            e.request = requests.Request(method, url)
+            self._notify(None, e, 0.0)
+            raise
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self.breaker.record_failure()
+            self._notify(None, e, time.perf_counter() - started)
+            raise
+        except Exception:
+            self.breaker.cancel_trial()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self._notify(response, None, time.perf_counter() - started)
+        return response
+
+    def _notify(self, response: Optional[requests.Response], error: Optional[Exception], seconds: float):
+        if self.on_result is not None:
+            self.on_result(response, error, seconds)
@@ -16,12 +16,12 @@ def compute_business_insights(df):
     insights = {}
     
     # Top performing dish overall
-    dish_totals = df.groupby('dish')['predicted_demand'].sum()
+    dish_totals = df.groupby('dish', observed=True)['predicted_demand'].sum()
     insights['top_dish'] = dish_totals.idxmax()
     insights['top_dish_demand'] = dish_totals.max()
     
     # Top performing outlet
-    outlet_totals = df.groupby('outlet')['predicted_demand'].sum()
+    outlet_totals = df.groupby('outlet', observed=True)['predicted_demand'].sum()
     insights['top_outlet'] = outlet_totals.idxmax()
     insights['top_outlet_demand'] = outlet_totals.max()
     
@@ -32,7 +32,7 @@ def compute_business_insights(df):
     insights['peak_day_demand'] = daily_totals.max()
     
     # Most consistent dish (lowest coefficient of variation)
-    dish_consistency = df.groupby('dish')['predicted_demand'].agg(['mean', 'std'])
+    dish_consistency = df.groupby('dish', observed=True)['predicted_demand'].agg(['mean', 'std'])
     dish_consistency['cv'] = dish_consistency['std'] / dish_consistency['mean']
     insights['most_consistent_dish'] = dish_consistency['cv'].idxmin()
     
@@ -41,30 +41,21 @@ def compute_business_insights(df):
     insights['unbalance_coefficient'] = dish_consistency['cv'].max()
     
     # Average demand per dish
-    insights['avg_demand_per_dish'] = df.groupby('dish')['predicted_demand'].mean().mean()
-    
-    # Best performing dish per outlet
-    best_dish_per_outlet = {}
-    for outlet in df['outlet'].unique():
-        outlet_data = df[df['outlet'] == outlet]
-        dish_sums = outlet_data.groupby('dish')['predicted_demand'].sum()
-        best_dish = dish_sums.idxmax()
-        best_dish_per_outlet[outlet] = {
-            'dish': best_dish,
-            'demand': dish_sums.max()
-        }
+    insights['avg_demand_per_dish'] = df.groupby('dish', observed=True)['predicted_demand'].mean().mean()
+    
+    # Best and worst performing dish per outlet, from one grouped pass
+    dish_sums = df.groupby(['outlet', 'dish'], observed=True)['predicted_demand'].sum()
+    by_outlet = dish_sums.groupby(level='outlet', observed=True)
+    best_dish_per_outlet = {
+        outlet: {'dish': dish, 'demand': dish_sums[(outlet, dish)]}
+        for outlet, dish in by_outlet.idxmax()
+    }
     insights['best_dish_per_outlet'] = best_dish_per_outlet
     
-    # Worst performing dish per outlet
-    worst_dish_per_outlet = {}
-    for outlet in df['outlet'].unique():
-        outlet_data = df[df['outlet'] == outlet]
-        dish_sums = outlet_data.groupby('dish')['predicted_demand'].sum()
-        worst_dish = dish_sums.idxmin()
-        worst_dish_per_outlet[outlet] = {
-            'dish': worst_dish,
-            'demand': dish_sums.min()
-        }
+    worst_dish_per_outlet = {
+        outlet: {'dish': dish, 'demand': dish_sums[(outlet, dish)]}
+        for outlet, dish in by_outlet.idxmin()
+    }
     insights['worst_dish_per_outlet'] = worst_dish_per_outlet
     
     return insights
@@ -163,8 +154,8 @@ def create_kpi_summary(df):
         'total_dishes': df['dish'].nunique(),
         'total_outlets': df['outlet'].nunique(),
         'peak_single_day': df.groupby('date')['predicted_demand'].sum().max(),
-        'best_dish_overall': df.groupby('dish')['predicted_demand'].sum().idxmax(),
-        'best_outlet_overall': df.groupby('outlet')['predicted_demand'].sum().idxmax(),
+        'best_dish_overall': df.groupby('dish', observed=True)['predicted_demand'].sum().idxmax(),
+        'best_outlet_overall': df.groupby('outlet', observed=True)['predicted_demand'].sum().idxmax(),
         'demand_range': {
             'min': df['predicted_demand'].min(),
             'max': df['predicted_demand'].max(),
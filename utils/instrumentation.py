@@ -0,0 +1,168 @@
+"""
+Client-side timing for the KKCG API client.
+
+Every instrumented client call leaves one record in a bounded ring: wall
+time, time spent in HTTP, decode time (the rest: JSON parsing and building
+DataFrames), bytes received and the last status. The HTTP part is reported
+by the session while the call runs on the same thread. Cache lookups are
+counted separately, so the Settings page can show latency per endpoint next
+to hit rates.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+class _Call:
+    def __init__(self, method: str):
+        self.method = method
+        self.endpoint: Optional[str] = None
+        self.status: Optional[str] = None
+        self.requests = 0
+        self.bytes = 0
+        self.http_seconds = 0.0
+        self.wall_seconds = 0.0
+
+
+class ClientMetrics:
+    """Bounded ring of per-call timings plus cache hit/miss counters"""
+
+    def __init__(self, capacity: int = 500):
+        self._records = deque(maxlen=capacity)
+        self._caches: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _current(self) -> Optional[_Call]:
+        return getattr(self._local, "call", None)
+
+    def observe_request(self, endpoint: str, status: str, seconds: float, size: int):
+        """Attribute one HTTP request to the call running on this thread, if any"""
+        call = self._current()
+        if call is None:
+            # Background traffic, such as health refreshes, is recorded on its own
+            call = _Call("(background)")
+            call.wall_seconds = seconds
+            self._add_request(call, endpoint, status, seconds, size)
+            self._store(call)
+            return
+        self._add_request(call, endpoint, status, seconds, size)
+
+    @staticmethod
+    def _add_request(call: _Call, endpoint: str, status: str, seconds: float, size: int):
+        call.endpoint = endpoint
+        call.status = status
+        call.requests += 1
+        call.http_seconds += seconds
+        call.bytes += size
+
+    def add_bytes(self, size: int):
+        """Count body bytes read after the request returned (streamed responses)"""
+        call = self._current()
+        if call is not None:
+            call.bytes += size
+
+    def count(self, cache: str, hit: bool):
+        with self._lock:
+            counts = self._caches.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def _store(self, call: _Call):
+        record = {
+            "method": call.method,
+            "endpoint": call.endpoint or "(cached)",
+            "status": call.status or "-",
+            "requests": call.requests,
+            "wall_ms": call.wall_seconds * 1000,
+            "http_ms": call.http_seconds * 1000,
+            "decode_ms": max(call.wall_seconds - call.http_seconds, 0) * 1000,
+            "bytes": call.bytes,
+            "at": time.time(),
+        }
+        with self._lock:
+            self._records.append(record)
+
+    def instrument(self, method: str, fn, *args, **kwargs):
+        """Run fn as the client call `method`; calls nested in another are part of it"""
+        if self._current() is not None:
+            return fn(*args, **kwargs)
+        call = self._local.call = _Call(method)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            call.wall_seconds = time.perf_counter() - started
+            self._local.call = None
+            self._store(call)
+
+    def instrument_iter(self, method: str, iterator):
+        """instrument() for generators: only time spent producing items counts"""
+        if self._current() is not None:
+            yield from iterator
+            return
+        call = _Call(method)
+        try:
+            while True:
+                self._local.call = call
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    call.wall_seconds += time.perf_counter() - started
+                    self._local.call = None
+                yield item
+        finally:
+            iterator.close()
+            self._store(call)
+
+    def records(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(list(self._records))
+
+    def endpoint_summary(self) -> pd.DataFrame:
+        """Calls, p50/p95 wall time, median decode time and bytes per endpoint"""
+        df = self.records()
+        if df.empty:
+            return df
+        grouped = df.groupby("endpoint")
+        summary = pd.DataFrame({
+            "calls": grouped.size(),
+            "p50_ms": grouped["wall_ms"].quantile(0.5),
+            "p95_ms": grouped["wall_ms"].quantile(0.95),
+            "decode_p50_ms": grouped["decode_ms"].quantile(0.5),
+            "avg_kb": grouped["bytes"].mean() / 1024,
+            "errors": grouped["status"].apply(lambda s: int((~s.str.fullmatch(r"[23]\d\d|-")).sum())),
+        })
+        return summary.sort_values("p95_ms", ascending=False).round(1)
+
+    def cache_hit_rates(self, extra: Optional[Dict[str, Tuple[int, int]]] = None) -> pd.DataFrame:
+        """Hits, misses and hit rate per cache; extra adds (hits, misses) counted elsewhere"""
+        with self._lock:
+            counts = {cache: tuple(c) for cache, c in self._caches.items()}
+        counts.update(extra or {})
+        rows = [{"cache": cache, "hits": hits, "misses": misses,
+                 "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+                for cache, (hits, misses) in sorted(counts.items())]
+        return pd.DataFrame(rows, columns=["cache", "hits", "misses", "hit_rate"])
+
+
+def instrumented(fn):
+    """Record calls to a client method in its ``metrics``"""
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(self, *args, **kwargs):
+            return self.metrics.instrument_iter(fn.__name__, fn(self, *args, **kwargs))
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        return self.metrics.instrument(fn.__name__, fn, self, *args, **kwargs)
+    return wrapper
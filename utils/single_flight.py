@@ -0,0 +1,65 @@
+"""
+Request coalescing for the KKCG API client.
+
+The client is shared by every Streamlit session, so after a cache clear many
+sessions can ask for the same data at once. SingleFlight lets the first
+caller for a key do the work while later callers wait for it and share the
+result, so the backend sees one request instead of one per session.
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome
+
+    Results are not kept once the call finishes, so callers arriving later
+    start a new call. Exceptions reach every waiting caller. A call cut short
+    by something other than an Exception (e.g. a script rerun in the calling
+    session) is retried by the next waiter instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is None:
+                return flight.result
+            if isinstance(flight.error, Exception):
+                raise flight.error
+            return self.do(key, fn)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
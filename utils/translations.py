@@ -48,6 +48,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "new_record": "New record",
         "active_dishes": "Active dishes",
         "vs_last_week": "vs last week",
+        "no_previous_week": "No data last week",
         
         # Dashboard sections
         "live_performance_dashboard": "Live Performance Dashboard",
@@ -104,6 +105,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "recommendations": "Recommendations",
         "high_confidence": "High Confidence",
         "confidence_desc": "Current predictions show High Confidence based on historical patterns and trend analysis.",
+        "measured_accuracy": "Measured accuracy, last 30 days",
         "trend_desc": "Demand shows steady growth with seasonal variations. Peak periods align with festival seasons and weekends.",
         "recommendations_desc": "Consider increasing inventory for high-demand items and optimizing staff scheduling based on predicted peaks.",
         
@@ -160,6 +162,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "available_api_endpoints": "Available API Endpoints",
         "system_information": "System Information",
         "application_information": "Application Information",
+        "client_performance": "Client Performance",
         
         "backend_information": "Backend Information",
         "security_features": "Security Features",
@@ -255,6 +258,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "new_record": "కొత్త రికార్డు",
         "active_dishes": "క్రియాశీల వంటకాలు",
         "vs_last_week": "గత వారంతో పోల్చితే",
+        "no_previous_week": "గత వారం డేటా లేదు",
         
         # Dashboard sections
         "live_performance_dashboard": "లైవ్ పెర్ఫార్మెన్స్ డ్యాష్‌బోర్డ్",
@@ -311,6 +315,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "recommendations": "సిఫార్సులు",
         "high_confidence": "అధిక విశ్వాసం",
         "confidence_desc": "చారిత్రక నమూనాలు మరియు ట్రెండ్ విశ్లేషణ ఆధారంగా ప్రస్తుత అంచనాలు అధిక విశ్వాసాన్ని చూపుతున్నాయి.",
+        "measured_accuracy": "కొలిచిన ఖచ్చితత్వం, గత 30 రోజులు",
         "trend_desc": "డిమాండ్ సీజనల్ వైవిధ్యాలతో స్థిరమైన వృద్ధిని చూపుతుంది. పీక్ పీరియడ్స్ పండుగ సీజన్లు మరియు వారాంతాలతో సమలేఖనం చేస్తాయి.",
         "recommendations_desc": "అధిక-డిమాండ్ వస్తువుల కోసం ఇన్వెంటరీని పెంచడం మరియు అంచనా వేసిన పీక్స్ ఆధారంగా స్టాఫ్ షెడ్యూలింగ్‌ను ఆప్టిమైజ్ చేయడాన్ని పరిగణించండి.",
         
@@ -367,6 +372,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "available_api_endpoints": "అందుబాటులో ఉన్న API ఎండ్‌పాయింట్లు",
         "system_information": "సిస్టమ్ సమాచారం",
         "application_information": "అప్లికేషన్ సమాచారం",
+        "client_performance": "క్లయింట్ పనితీరు",
         
         "backend_information": "బ్యాకెండ్ సమాచారం",
         "security_features": "భద్రతా లక్షణాలు",
@@ -462,6 +468,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "new_record": "नया रिकॉर्ड",
         "active_dishes": "सक्रिय व्यंजन",
         "vs_last_week": "पिछले सप्ताह की तुलना में",
+        "no_previous_week": "पिछले सप्ताह का डेटा नहीं",
         
         # Dashboard sections
         "live_performance_dashboard": "लाइव प्रदर्शन डैशबोर्ड",
@@ -518,6 +525,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "recommendations": "सिफारिशें",
         "high_confidence": "उच्च विश्वास",
         "confidence_desc": "ऐतिहासिक पैटर्न और प्रवृत्ति विश्लेषण के आधार पर वर्तमान पूर्वानुमान उच्च विश्वास दिखाते हैं।",
+        "measured_accuracy": "मापी गई सटीकता, पिछले 30 दिन",
         "trend_desc": "मांग मौसमी विविधताओं के साथ स्थिर विकास दिखाती है। चरम अवधि त्योहारी सीज़न और सप्ताहांत के साथ संरेखित होती है।",
         "recommendations_desc": "उच्च-मांग वाली वस्तुओं के लिए इन्वेंटरी बढ़ाने और अनुमानित चरम के आधार पर स्टाफ शेड्यूलिंग को अनुकूलित करने पर विचार करें।",
         
@@ -574,6 +582,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "available_api_endpoints": "उपलब्ध API एंडपॉइंट्स",
         "system_information": "सिस्टम जानकारी",
         "application_information": "एप्लिकेशन जानकारी",
+        "client_performance": "क्लाइंट प्रदर्शन",
         
         "backend_information": "बैकएंड जानकारी",
         "security_features": "सुरक्षा सुविधाएं",